@@ -0,0 +1,57 @@
+import time
+
+from voice_recorder import LatencyTrace, StageMetrics
+
+
+def test_stages_add_up_to_their_phase_and_nested_spans_stay_apart():
+    trace = LatencyTrace()
+    trace.add('first_sample', 0.5)
+    trace.begin('hotkey_to_paste', time.perf_counter() - 0.1)
+    trace.add('queue_wait', 0.01)
+    with trace.span('transcribe'):
+        trace.add('api', 0.02)
+        with trace.span('wav_write'):
+            pass
+    trace.add('clipboard_wait', 0.03)
+    trace.end()
+
+    tree = trace.as_ms()
+    assert tree['first_sample'] == 500.0
+    paste = tree['hotkey_to_paste']
+    assert list(paste) == ['total', 'queue_wait', 'transcribe', 'clipboard_wait', 'other']
+    assert set(paste['transcribe']) == {'total', 'api', 'wav_write', 'other'}
+    top = sum(value['total'] if isinstance(value, dict) else value
+              for stage, value in paste.items() if stage != 'total')
+    assert abs(top - paste['total']) < 0.05
+    assert paste['total'] >= 100.0
+
+
+def test_a_repeated_stage_accumulates_under_its_first_parent():
+    trace = LatencyTrace()
+    with trace.span('transcribe'):
+        trace.add('snr', 0.001)
+    trace.add('snr', 0.002)
+    assert trace.parents == {'snr': 'transcribe'}
+    assert trace.stages['snr'] == 0.003
+
+
+def test_stages_without_a_phase_are_top_level():
+    trace = LatencyTrace()
+    with trace.span('vad'):
+        pass
+    trace.add('api', 0.25)
+    trace.end()
+    assert set(trace.as_ms()) == {'vad', 'api'}
+    assert trace.as_ms()['api'] == 250.0
+
+
+def test_stage_snapshot_is_unaffected_by_stages_added_later():
+    metrics = StageMetrics()
+    trace = LatencyTrace()
+    trace.add('api', 0.5)
+    trace.add('clipboard_wait', 0.2)
+    metrics.record(trace)
+    snapshot = metrics.items()
+    metrics.histogram('vad')
+    assert [stage for stage, _ in snapshot] == ['api', 'clipboard_wait']
+    assert [stage for stage, _ in metrics.items()] == ['api', 'clipboard_wait', 'vad']
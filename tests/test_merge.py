@@ -0,0 +1,57 @@
+from voice_recorder import merge_overlapping_transcripts
+
+
+def test_drops_words_repeated_in_the_overlap():
+    merged = merge_overlapping_transcripts(["the quick brown fox jumps", "fox jumps over the lazy dog"])
+    assert merged == "the quick brown fox jumps over the lazy dog"
+
+
+def test_drops_garbled_words_at_the_window_edges():
+    merged = merge_overlapping_transcripts(["we should ship the release on frid",
+                                            "ay the release on friday morning"])
+    assert merged == "we should ship the release on friday morning"
+
+
+def test_concatenates_texts_without_a_credible_overlap():
+    merged = merge_overlapping_transcripts(["first part of the talk", "an entirely different sentence"])
+    assert merged == "first part of the talk an entirely different sentence"
+
+
+def test_single_short_word_is_not_an_overlap():
+    assert merge_overlapping_transcripts(["go to the", "the shop"]) == "go to the the shop"
+
+
+def test_phrase_repeated_beyond_the_overlap_window_is_kept():
+    left = "one two three four five alpha bravo charlie delta"
+    right = ("echo foxtrot golf hotel india juliet kilo lima mike november "
+             "alpha bravo charlie delta oscar")
+    merged = merge_overlapping_transcripts([left, right], max_overlap_words=8)
+    assert merged == f"{left} {right}"
+
+
+def test_repetitive_chunks_do_not_collapse():
+    sentence = "this is a repeated mock transcript sentence with twelve words in it"
+    texts = [f"chunk {i} {sentence}" for i in range(12)]
+    merged = merge_overlapping_transcripts(texts, max_overlap_words=8)
+    for i in range(12):
+        assert f"chunk {i}" in merged
+
+
+def test_merge_is_deterministic():
+    texts = ["a b c hello there general kenobi", "hello there general kenobi you are a bold one"]
+    assert merge_overlapping_transcripts(texts) == merge_overlapping_transcripts(list(texts))
+
+
+def test_similar_but_different_chunks_both_survive():
+    texts = ["Mock transcript of 960,044 bytes (1a2b3c4d).", "Mock transcript of 960,044 bytes (5e6f7a8b)."]
+    assert merge_overlapping_transcripts(texts) == " ".join(texts)
+
+
+def test_overlap_never_swallows_a_whole_short_text():
+    merged = merge_overlapping_transcripts(["thanks so much everyone", "thanks so much"])
+    assert merged == "thanks so much everyone thanks so much"
+
+
+def test_overlap_sits_at_the_ends_of_both_texts():
+    merged = merge_overlapping_transcripts(["we met at the station yesterday", "at the stadium we watched the game"])
+    assert merged == "we met at the station yesterday at the stadium we watched the game"
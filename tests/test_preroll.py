@@ -0,0 +1,67 @@
+import threading
+import time
+
+import pyaudio
+
+from voice_recorder import RingBuffer, VoiceRecorder
+
+RATE = 16000
+FRAME_BYTES = 2
+
+
+class RunningStream:
+    def is_active(self):
+        return True
+
+
+def warm_recorder(preroll_ms):
+    # Only the state start_recording touches on the warm pre-roll path
+    recorder = VoiceRecorder.__new__(VoiceRecorder)
+    recorder.is_recording = False
+    recorder.RATE = RATE
+    recorder.FORMAT = pyaudio.paInt16
+    recorder.CHANNELS = 1
+    recorder.prealloc_seconds = 5
+    recorder.preroll_ms = preroll_ms
+    recorder.preroll = RingBuffer(RATE * preroll_ms // 1000 * FRAME_BYTES)
+    recorder.preroll_seconds_used = 0.0
+    recorder._stream = RunningStream()
+    recorder._capture_lock = threading.Lock()
+    recorder._callback_seconds = 0.0
+    recorder._callback_window_start = time.perf_counter()
+    recorder._wav_writer = None
+    recorder.stream_to_disk = False
+    recorder.streaming = False
+    recorder.prewarm_connection = False
+    return recorder
+
+
+def feed(recorder, seconds, value):
+    recorder.preroll.write(bytes([value]) * int(RATE * seconds) * FRAME_BYTES)
+
+
+def test_start_cue_does_not_eat_the_preroll():
+    recorder = warm_recorder(500)
+    feed(recorder, 2.0, 1)
+
+    def cue(event):
+        # The pre-roll stream keeps running while a 350 ms cue plays
+        feed(recorder, 0.35, 0x7f)
+
+    recorder.audio_cue = cue
+    recorder.start_recording()
+
+    audio = bytes(recorder.audio_frames.getbuffer())
+    assert abs(recorder.preroll_seconds_used - 0.5) < 0.01
+    assert len(audio) == RATE // 2 * FRAME_BYTES
+    assert 0x7f not in audio
+
+
+def test_cue_longer_than_the_preroll_keeps_it_whole():
+    recorder = warm_recorder(200)
+    feed(recorder, 1.0, 1)
+    recorder.audio_cue = lambda event: feed(recorder, 0.35, 0x7f)
+    recorder.start_recording()
+
+    assert abs(recorder.preroll_seconds_used - 0.2) < 0.01
+    assert 0x7f not in bytes(recorder.audio_frames.getbuffer())
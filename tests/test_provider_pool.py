@@ -0,0 +1,116 @@
+import threading
+import time
+
+import pytest
+
+from voice_recorder import ProviderPool, TranscriptionBackend, TranscriptionCancelled
+
+
+class FakeBackend(TranscriptionBackend):
+    """Answers after a fixed latency, or fails for its first ``failures`` calls"""
+
+    def __init__(self, name, latency=0.0, failures=0):
+        super().__init__(name, "fake", 0.0)
+        self.latency = latency
+        self.failures = failures
+        self.calls = []
+        self.finished = []
+
+    @classmethod
+    def from_env(cls, http_client):
+        return None
+
+    def transcribe(self, file, tier='full', timeout=None):
+        self.calls.append(timeout)
+        time.sleep(self.latency)
+        self.finished.append(time.monotonic())
+        if len(self.calls) <= self.failures:
+            raise RuntimeError(f"{self.name} is down")
+        return f"text from {self.name}"
+
+
+def attempt(provider, timeout):
+    return provider.transcribe(None, timeout=timeout)
+
+
+def measured(backend, latency, samples=10):
+    for _ in range(samples):
+        backend.stats.record_success(latency)
+    return backend
+
+
+def test_hedges_after_the_p95_delay_and_discards_the_loser():
+    slow = measured(FakeBackend("primary", latency=1.0), 0.2)
+    fast = measured(FakeBackend("secondary", latency=0.01), 0.5)
+    pool = ProviderPool([slow, fast], hedge_min_delay=0.05)
+
+    started = time.monotonic()
+    provider, result, hedged = pool.transcribe(attempt)
+    elapsed = time.monotonic() - started
+
+    assert (provider, result, hedged) == (fast, "text from secondary", True)
+    assert 0.2 <= elapsed < 0.6
+    assert not slow.finished
+    # The losing request is left to finish; its answer goes nowhere
+    time.sleep(1.0)
+    assert slow.finished
+
+
+def test_no_hedge_when_the_primary_answers_in_time():
+    primary = measured(FakeBackend("primary", latency=0.05), 0.5)
+    secondary = measured(FakeBackend("secondary"), 0.5)
+    pool = ProviderPool([primary, secondary], hedge_min_delay=0.05)
+
+    provider, _, hedged = pool.transcribe(attempt)
+    assert (provider, hedged) == (primary, False)
+    assert secondary.calls == []
+
+
+def test_fails_over_to_the_next_provider_on_error():
+    broken = FakeBackend("primary", failures=1)
+    backup = FakeBackend("secondary")
+    pool = ProviderPool([broken, backup], hedge=False, retries=0)
+
+    provider, result, hedged = pool.transcribe(attempt)
+    assert (provider, result, hedged) == (backup, "text from secondary", False)
+    assert broken.stats.failures == 1
+
+
+def test_retries_a_lone_provider_once():
+    flaky = FakeBackend("only", failures=1)
+    assert ProviderPool([flaky], retries=1).transcribe(attempt)[1] == "text from only"
+    assert len(flaky.calls) == 2
+
+    with pytest.raises(RuntimeError, match="down"):
+        ProviderPool([FakeBackend("down", failures=5)], retries=1).transcribe(attempt)
+
+
+def test_deadline_bounds_the_whole_call():
+    stalled = FakeBackend("stalled", latency=2.0)
+    started = time.monotonic()
+    with pytest.raises(TimeoutError):
+        ProviderPool([stalled]).transcribe(attempt, timeout=0.3)
+    assert time.monotonic() - started < 0.6
+    # The request itself was told how long it had
+    assert stalled.calls[0] == pytest.approx(0.3, abs=0.05)
+
+
+def test_cancel_returns_promptly():
+    stalled = FakeBackend("stalled", latency=2.0)
+    cancel = threading.Event()
+    threading.Timer(0.1, cancel.set).start()
+    started = time.monotonic()
+    with pytest.raises(TranscriptionCancelled):
+        ProviderPool([stalled]).transcribe(attempt, cancel=cancel)
+    assert time.monotonic() - started < 0.5
+
+
+def test_ranks_measured_healthy_providers_first():
+    unmeasured = FakeBackend("new")
+    erroring = measured(FakeBackend("erroring"), 0.1)
+    for _ in range(10):
+        erroring.stats.record_failure()
+    healthy = measured(FakeBackend("healthy"), 0.8)
+    quick = measured(FakeBackend("quick"), 0.3)
+    pool = ProviderPool([unmeasured, erroring, healthy, quick])
+    assert [p.name for p in pool.ranked()] == ["quick", "healthy", "new", "erroring"]
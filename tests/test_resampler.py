@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from voice_recorder import PolyphaseResampler, resample_pcm16
+
+
+def tone(freq, rate, seconds=0.5, amplitude=8000):
+    t = np.arange(int(rate * seconds)) / rate
+    return (np.sin(2 * np.pi * freq * t) * amplitude).astype(np.int16).tobytes()
+
+
+def spectrum_peak(pcm, rate):
+    samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float64)
+    magnitudes = np.abs(np.fft.rfft(samples * np.hanning(len(samples))))
+    return np.fft.rfftfreq(len(samples), 1 / rate)[np.argmax(magnitudes)]
+
+
+def rms(pcm):
+    samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float64)
+    return np.sqrt(np.mean(samples ** 2))
+
+
+@pytest.mark.parametrize("src,dst", [(44100, 16000), (48000, 16000), (16000, 44100)])
+def test_output_length_and_pitch(src, dst):
+    out = resample_pcm16(tone(440, src), src, dst)
+    assert len(out) // 2 == -(-int(src * 0.5) * dst // src)
+    assert spectrum_peak(out, dst) == pytest.approx(440, abs=5)
+    # The passband keeps its level
+    assert rms(out) == pytest.approx(rms(tone(440, src)), rel=0.02)
+
+
+def test_matching_rates_pass_through():
+    pcm = tone(440, 16000)
+    assert resample_pcm16(pcm, 16000, 16000) is pcm
+
+
+def test_streamed_blocks_match_a_single_pass():
+    pcm = tone(440, 44100, seconds=1.0)
+    resampler = PolyphaseResampler(44100, 16000)
+    streamed = b"".join(resampler.process(pcm[i:i + 2 * 1021]) for i in range(0, len(pcm), 2 * 1021))
+    streamed += resampler.flush()
+    assert streamed == resample_pcm16(pcm, 44100, 16000)
+
+
+def test_content_above_the_new_nyquist_is_filtered_out():
+    out = resample_pcm16(tone(12000, 44100), 44100, 16000)
+    # A 12 kHz tone would alias to 4 kHz at 16 kHz without the low-pass
+    assert rms(out) < rms(tone(12000, 44100)) * 0.01
@@ -0,0 +1,90 @@
+import io
+import os
+import time
+
+from voice_recorder import AudioPayload, TranscriptionSpool
+
+OGG = b"OggS" + bytes(60)
+
+
+def spool_in(tmp_path, retry, delivered=None):
+    deliver = (lambda entry, text: delivered.append(text)) if delivered is not None else (lambda entry, text: None)
+    return TranscriptionSpool(str(tmp_path / "spool"), retry, deliver, max_bytes=1 << 20, max_age_seconds=3600)
+
+
+def upload_name(path, entry):
+    # What _retry_spooled rebuilds from an entry, as the backend receives it
+    audio = AudioPayload(entry['filename'], path=path, format=entry['format'])
+    with audio.open() as file:
+        name, body = file
+        return name, body.read()
+
+
+def test_opus_upload_keeps_its_ogg_name_through_the_spool(tmp_path):
+    uploads, delivered = [], []
+
+    def retry(path, entry):
+        uploads.append(upload_name(path, entry))
+        return "recovered"
+
+    spool = spool_in(tmp_path, retry, delivered)
+    assert spool.add(AudioPayload("recording.ogg", buffer=io.BytesIO(OGG), format="opus"), {}, "HTTP 500")
+    [entry] = spool.entries()
+    assert entry['audio_file'].endswith(".ogg")
+
+    spool._attempt(entry)
+    assert uploads == [("recording.ogg", OGG)]
+    assert delivered == ["recovered"]
+    assert len(spool) == 0
+
+
+def test_spilled_upload_is_moved_into_the_spool_under_its_upload_name(tmp_path):
+    spill = tmp_path / "tmpabc123.flac"
+    spill.write_bytes(b"fLaC" + bytes(60))
+    spool = spool_in(tmp_path, upload_name)
+    audio = AudioPayload("recording.flac", path=str(spill), format="flac")
+    assert spool.add(audio, {}, "timeout")
+    assert not spill.exists()
+
+    [entry] = spool.entries()
+    path = os.path.join(spool.directory, entry['audio_file'])
+    assert upload_name(path, entry) == ("recording.flac", b"fLaC" + bytes(60))
+
+
+def test_backoff_grows_with_equal_jitter_up_to_the_cap(tmp_path):
+    spool = TranscriptionSpool(str(tmp_path / "spool"), None, None, max_bytes=1 << 20, max_age_seconds=3600,
+                               base_delay=10.0, max_delay=100.0)
+    for attempts, delay in [(0, 10.0), (1, 20.0), (2, 40.0), (3, 80.0), (4, 100.0), (10, 100.0)]:
+        samples = [spool._backoff(attempts) for _ in range(200)]
+        assert all(delay / 2 <= sample <= delay for sample in samples)
+        assert max(samples) - min(samples) > delay / 4
+
+
+def test_failed_retry_is_rescheduled_and_kept(tmp_path):
+    def retry(path, entry):
+        raise RuntimeError("still down")
+
+    spool = spool_in(tmp_path, retry)
+    spool.add(AudioPayload("recording.wav", buffer=io.BytesIO(b"RIFF" + bytes(40))), {}, "HTTP 500")
+    [entry] = spool.entries()
+    before = time.time()
+    spool._attempt(entry)
+
+    [saved] = spool.entries()
+    assert saved['attempts'] == 1
+    assert saved['last_error'] == "still down"
+    assert before + spool.base_delay <= saved['next_attempt'] <= time.time() + spool.base_delay * 2
+
+
+def test_expired_and_over_quota_entries_are_dropped_oldest_first(tmp_path):
+    spool = TranscriptionSpool(str(tmp_path / "spool"), None, None, max_bytes=100, max_age_seconds=60)
+    for _ in range(3):
+        spool.add(AudioPayload("recording.wav", buffer=io.BytesIO(bytes(40))), {}, "HTTP 500")
+    kept = [entry['id'] for entry in spool.entries()]
+    assert len(kept) == 2
+
+    stale = spool.entries()[0]
+    stale['created_at'] -= 120
+    spool._save(stale)
+    spool._enforce_limits()
+    assert [entry['id'] for entry in spool.entries()] == kept[1:]
@@ -0,0 +1,129 @@
+import gzip
+import json
+import sqlite3
+
+import pytest
+
+from voice_recorder import UsageLogWriter, UsageStore
+
+
+def record(day, status="ok", provider="OpenAI", audio=30.0, api=1.0, cost=0.003, **extra):
+    data = {"timestamp": f"{day}T12:00:00", "api_provider": provider, "status": status,
+            "recording_duration_seconds": audio}
+    if status == "ok":
+        data.update(audio_uploaded_seconds=audio, api_response_time_seconds=api, estimated_cost_usd=cost)
+    data.update(extra)
+    return data
+
+
+def write_jsonl(path, records, opener=open):
+    with opener(path, "wt", encoding="utf-8") as f:
+        for data in records:
+            f.write(json.dumps(data) + "\n")
+
+
+def test_writer_imports_history_into_a_new_store(tmp_path):
+    log = tmp_path / "usage.jsonl"
+    write_jsonl(tmp_path / "usage.20250101-000000.jsonl.gz", [record("2025-01-01")], gzip.open)
+    write_jsonl(log, [record("2025-01-02"), record("2025-01-02")])
+
+    store = UsageStore(str(tmp_path / "usage.db"))
+    assert store.created
+    writer = UsageLogWriter(str(log), flush_interval=0.05, fsync=False, store=store)
+    writer.write(record("2025-01-03"))
+    writer.close()
+
+    reopened = UsageStore(str(tmp_path / "usage.db"))
+    try:
+        assert not reopened.created
+        assert len(reopened) == 4
+        assert [row[:2] for row in reopened.daily_stats("2025-01-01")] == [
+            ("2025-01-01", 1), ("2025-01-02", 2), ("2025-01-03", 1)]
+    finally:
+        reopened.close()
+
+
+def test_rollup_counts_cancels_apart_and_audio_only_for_successes(tmp_path):
+    store = UsageStore(str(tmp_path / "usage.db"))
+    try:
+        store.insert([
+            record("2025-01-01", audio=60.0),
+            record("2025-01-01", status="cancelled", provider="none", audio=120.0),
+            record("2025-01-01", status="failed", provider="Azure OpenAI", audio=120.0),
+            record("2025-01-01", provider="cache", audio=60.0, cache_hit=True, estimated_cost_usd=0.0),
+        ])
+        [(day, requests, failures, cancelled, minutes, cost, p50, p95)] = store.daily_stats("2025-01-01")
+        assert (requests, failures, cancelled) == (4, 1, 1)
+        assert minutes == pytest.approx(1.0)
+        assert cost == pytest.approx(0.003)
+        assert [row[1:4] for row in store.daily_stats("2025-01-01", "Azure OpenAI")] == [(1, 1, 0)]
+        assert [row[1:4] for row in store.daily_stats("2025-01-01", "none")] == [(1, 0, 1)]
+    finally:
+        store.close()
+
+
+def test_latency_percentiles_per_day(tmp_path):
+    store = UsageStore(str(tmp_path / "usage.db"))
+    try:
+        store.insert([record("2025-01-01", api=float(seconds)) for seconds in range(1, 101)])
+        store.insert([record("2025-01-01", status="failed")])
+        [row] = store.daily_stats("2025-01-01")
+        assert row[-2:] == (51.0, 95.0)
+    finally:
+        store.close()
+
+
+def test_older_schema_is_rebuilt_for_import(tmp_path):
+    path = tmp_path / "usage.db"
+    db = sqlite3.connect(path)
+    db.execute("CREATE TABLE daily (day TEXT, provider TEXT, requests INTEGER, failures INTEGER)")
+    db.commit()
+    db.close()
+    store = UsageStore(str(path))
+    try:
+        assert store.created
+        store.insert([record("2025-01-01")])
+        assert len(store) == 1
+    finally:
+        store.close()
+
+
+def test_read_only_open_never_creates_a_store(tmp_path):
+    path = tmp_path / "missing.db"
+    with pytest.raises(FileNotFoundError):
+        UsageStore(str(path), read_only=True)
+    assert not path.exists()
+
+    UsageStore(str(path)).close()
+    store = UsageStore(str(path), read_only=True)
+    try:
+        with pytest.raises(sqlite3.OperationalError):
+            store.insert([record("2025-01-01")])
+    finally:
+        store.close()
+
+
+def test_failed_parts_of_one_recording_count_as_one_failure(tmp_path):
+    store = UsageStore(str(tmp_path / "usage.db"))
+    try:
+        store.insert([record("2025-01-01", status="failed", recording_id="a", chunk=i + 1) for i in range(6)])
+        store.insert([record("2025-01-01", status="failed", recording_id="b")])
+        store.insert([record("2025-01-01", status="failed", recording_id="a", spool_retry=True)])
+        [(day, requests, failures, cancelled, *_)] = store.daily_stats("2025-01-01")
+        assert (requests, failures, cancelled) == (8, 2, 0)
+    finally:
+        store.close()
+
+
+def test_provider_filter_covers_every_deployment(tmp_path):
+    store = UsageStore(str(tmp_path / "usage.db"))
+    try:
+        store.insert([record("2025-01-01", provider="Azure OpenAI (whisper-eu)", api=2.0),
+                      record("2025-01-01", provider="Azure OpenAI (whisper-us)", api=4.0),
+                      record("2025-01-01", provider="OpenAI", api=1.0)])
+        [row] = store.daily_stats("2025-01-01", "Azure OpenAI")
+        assert row[1] == 2
+        assert row[-2:] == (2.0, 4.0)
+        assert [row[1] for row in store.daily_stats("2025-01-01", "Azure OpenAI (whisper-us)")] == [1]
+    finally:
+        store.close()
@@ -4,20 +4,34 @@ Global Voice-to-Text Recorder
 Listens for hotkey, records audio, transcribes with Whisper, and pastes text
 """
 
+import io
 import os
 import sys
+import abc
+import argparse
 import threading
 import tempfile
 import wave
 import time
 import logging
 import json
+import gzip
+import hashlib
+import queue
 import platform
 import math
+import random
 import shutil
+import sqlite3
+import struct
 import subprocess
+import urllib.request
 from array import array
-from datetime import datetime
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from typing import Optional
 from dotenv import load_dotenv
 # Load environment variables
@@ -33,63 +47,2437 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+import httpx
+import numpy as np
 import pyaudio
 import pyperclip
 from pynput.keyboard import Key, Listener
 from openai import OpenAI
 
+try:
+    import soundfile
+except (ImportError, OSError):  # OSError when the libsndfile library itself is missing
+    soundfile = None
+
+try:
+    from faster_whisper import WhisperModel
+except ImportError:
+    WhisperModel = None
+
+def env_flag(name: str, default: bool) -> bool:
+    """Read an on/off style environment variable"""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() not in ['0', 'off', 'false', 'no', '']
+
+
+class ConnectionTracer:
+    """Records how each HTTP request got its connection: reused from the pool or freshly handshaken.
+
+    Installed as an httpx request hook; it attaches an httpcore ``trace``
+    callback to every request and keeps the result per thread, so the
+    thread that made an API call can read its own connection details.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def on_request(self, request: httpx.Request):
+        info = {'connection_reused': True, 'tcp_connect_ms': None, 'tls_handshake_ms': None}
+        started = {}
+
+        def trace(event: str, _details):
+            now = time.perf_counter()
+            step, _, phase = event.rpartition('.')
+            if phase == 'started':
+                started[step] = now
+            elif phase == 'complete' and step in ('connection.connect_tcp', 'connection.start_tls'):
+                elapsed_ms = round((now - started.get(step, now)) * 1000, 1)
+                if step == 'connection.connect_tcp':
+                    info['connection_reused'] = False
+                    info['tcp_connect_ms'] = elapsed_ms
+                else:
+                    info['tls_handshake_ms'] = elapsed_ms
+
+        request.extensions['trace'] = trace
+        self._local.last = info
+
+    def last(self) -> dict:
+        """Connection details of the most recent request made on this thread"""
+        return dict(getattr(self._local, 'last', None) or {})
+
+
+def build_http_client(tracer: ConnectionTracer, keepalive_seconds: float,
+                      connect_timeout: float = 10.0, read_timeout: float = 600.0) -> httpx.Client:
+    """Pooled keep-alive HTTP client for the OpenAI SDK, instrumented with ``tracer``"""
+    return httpx.Client(
+        limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=keepalive_seconds),
+        # The OpenAI SDK adopts a custom client's timeout; read covers waiting on the transcription itself
+        timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+        follow_redirects=True,
+        # Lets the connection path be tested against a local HTTPS stand-in with its own CA
+        verify=os.getenv('VOICE_CA_BUNDLE') or True,
+        event_hooks={'request': [tracer.on_request]}
+    )
+
+
+class LatencyHistogram:
+    """HDR-style latency histogram: fixed memory, ~1.6% relative error, lock-protected.
+
+    Values are recorded in microseconds into log-linear buckets: exact
+    below 128 µs, then 64 linear sub-buckets per power of two, so any
+    percentile is within one sub-bucket of the true value regardless of
+    how many samples were recorded.
+    """
+
+    SUB_BUCKETS = 128
+
+    def __init__(self):
+        self._counts = {}
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    @classmethod
+    def _index(cls, micros: int) -> int:
+        if micros < cls.SUB_BUCKETS:
+            return micros
+        half = cls.SUB_BUCKETS // 2
+        shift = micros.bit_length() - half.bit_length()
+        return cls.SUB_BUCKETS + (shift - 1) * half + (micros >> shift) - half
+
+    @classmethod
+    def _value(cls, index: int) -> float:
+        """Midpoint of a bucket, in microseconds"""
+        if index < cls.SUB_BUCKETS:
+            return float(index)
+        half = cls.SUB_BUCKETS // 2
+        shift, sub = divmod(index - cls.SUB_BUCKETS, half)
+        shift += 1
+        return ((sub + half) << shift) + ((1 << shift) - 1) / 2
+
+    def record(self, seconds: float):
+        micros = max(0, int(seconds * 1e6))
+        with self._lock:
+            index = self._index(micros)
+            self._counts[index] = self._counts.get(index, 0) + 1
+            self.count += 1
+            self.total_seconds += seconds
+            self.max_seconds = max(self.max_seconds, seconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Approximate ``p``th percentile in seconds, or None before any samples"""
+        with self._lock:
+            if not self.count:
+                return None
+            rank = max(1, math.ceil(p / 100 * self.count))
+            seen = 0
+            for index in sorted(self._counts):
+                seen += self._counts[index]
+                if seen >= rank:
+                    return min(self._value(index) / 1e6, self.max_seconds)
+        return self.max_seconds
+
+    def cumulative(self, bounds):
+        """Samples at or below each bound (seconds), for fixed-bucket exports such as Prometheus"""
+        with self._lock:
+            counts = list(self._counts.items())
+        return [sum(count for index, count in counts if self._value(index) / 1e6 <= bound) for bound in bounds]
+
+
+class LatencyTrace:
+    """Named stage timings for one recording, from hotkey to paste.
+
+    ``span()`` times a block; ``add()`` records a duration measured
+    elsewhere. A stage timed more than once accumulates. A stage timed
+    inside an open span is nested under it; otherwise it belongs to the
+    current phase, opened by ``begin()`` and totalled by ``end()``. The
+    stages directly under a phase or span never overlap.
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self.parents = {}
+        self._open = []
+        self._phase = None
+        self._phase_started = 0.0
+
+    def begin(self, phase: str, started: Optional[float] = None):
+        self._phase = phase
+        self._phase_started = time.perf_counter() if started is None else started
+
+    def end(self):
+        phase, self._phase = self._phase, None
+        if phase is not None:
+            self.add(phase, time.perf_counter() - self._phase_started)
+
+    @contextmanager
+    def span(self, stage: str):
+        started = time.perf_counter()
+        self._open.append(stage)
+        try:
+            yield
+        finally:
+            self._open.pop()
+            self.add(stage, time.perf_counter() - started)
+
+    def add(self, stage: str, seconds: float):
+        parent = self._open[-1] if self._open else self._phase
+        if parent is not None and parent != stage:
+            self.parents.setdefault(stage, parent)
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def as_ms(self, parent: Optional[str] = None) -> dict:
+        """Timings in ms as a tree: a stage with nested stages becomes ``{"total", <stages>..., "other"}``,
+        where ``other`` is the part of the total no nested stage accounts for"""
+        tree = {}
+        for stage, seconds in self.stages.items():
+            if self.parents.get(stage) != parent:
+                continue
+            total = round(seconds * 1000, 2)
+            children = self.as_ms(stage)
+            if children:
+                timed = sum(child['total'] if isinstance(child, dict) else child for child in children.values())
+                tree[stage] = dict(total=total, **children, other=round(max(0.0, total - timed), 2))
+            else:
+                tree[stage] = total
+        return tree
+
+
+class StageMetrics:
+    """Per-stage latency histograms aggregated over every recording in this process"""
+
+    def __init__(self):
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, stage: str) -> LatencyHistogram:
+        with self._lock:
+            if stage not in self.histograms:
+                self.histograms[stage] = LatencyHistogram()
+            return self.histograms[stage]
+
+    def record(self, trace: LatencyTrace):
+        for stage, seconds in trace.stages.items():
+            self.histogram(stage).record(seconds)
+
+    def items(self):
+        """Snapshot of ``(stage, histogram)`` pairs, safe while pipeline threads add stages"""
+        with self._lock:
+            return sorted(self.histograms.items())
+
+    def summary(self, stages=None) -> str:
+        with self._lock:
+            histograms = dict(self.histograms)
+        parts = []
+        for stage in stages or list(histograms):
+            histogram = histograms.get(stage)
+            if histogram is None or not histogram.count:
+                continue
+            parts.append(f"{stage} p50 {histogram.percentile(50) * 1000:.1f} / "
+                         f"p95 {histogram.percentile(95) * 1000:.1f} ms")
+        return ", ".join(parts)
+
+
+class Counters:
+    """Thread-safe monotonic counters, optionally labelled, for the metrics endpoint"""
+
+    def __init__(self):
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def items(self):
+        """Snapshot of ``((name, labels), value)`` pairs"""
+        with self._lock:
+            return sorted(self._values.items())
+
+
+class PCMBuffer:
+    """Growable contiguous PCM buffer filled from the PortAudio callback.
+
+    Capacity is preallocated up front and doubled when exhausted, so the
+    callback only copies into existing memory; ``getbuffer()`` exposes the
+    captured bytes without joining or copying them.
+    """
+
+    def __init__(self, capacity: int = 0):
+        self._buf = bytearray(capacity)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def write(self, data) -> None:
+        """Append raw PCM bytes, growing the backing store if needed"""
+        end = self._size + len(data)
+        if end > len(self._buf):
+            self._grow(end)
+        self._buf[self._size:end] = data
+        self._size = end
+
+    def _grow(self, needed: int):
+        # Allocate a new block rather than resizing in place: resizing a
+        # bytearray fails while any memoryview of it is still alive.
+        grown = bytearray(max(needed, len(self._buf) * 2, 4096))
+        grown[:self._size] = memoryview(self._buf)[:self._size]
+        self._buf = grown
+
+    def getbuffer(self) -> memoryview:
+        """Zero-copy view of the bytes captured so far (safe to call while the callback writes)"""
+        # Read the size before the buffer: a concurrent grow copies everything below the old size
+        size = self._size
+        return memoryview(self._buf)[:size]
+
+    def clear(self):
+        self._size = 0
+
+
+class RingBuffer:
+    """Fixed-size circular byte buffer that keeps only the most recent audio"""
+
+    def __init__(self, capacity: int):
+        self._buf = bytearray(capacity)
+        self._pos = 0
+        self._full = False
+
+    def __len__(self) -> int:
+        return len(self._buf) if self._full else self._pos
+
+    @property
+    def capacity(self) -> int:
+        return len(self._buf)
+
+    def write(self, data) -> None:
+        """Overwrite the oldest bytes with ``data``"""
+        data = memoryview(data).cast('B')
+        cap = len(self._buf)
+        n = len(data)
+        if n >= cap:
+            self._buf[:] = data[n - cap:]
+            self._pos = 0
+            self._full = True
+            return
+        end = self._pos + n
+        if end <= cap:
+            self._buf[self._pos:end] = data
+        else:
+            first = cap - self._pos
+            self._buf[self._pos:] = data[:first]
+            self._buf[:n - first] = data[first:]
+        self._pos = end % cap
+        if end >= cap:
+            self._full = True
+
+    def snapshot(self) -> bytes:
+        """Copy out the buffered bytes, oldest first"""
+        if not self._full:
+            return bytes(self._buf[:self._pos])
+        view = memoryview(self._buf)
+        return b''.join((view[self._pos:], view[:self._pos]))
+
+    def clear(self):
+        self._pos = 0
+        self._full = False
+
+
+class PolyphaseResampler:
+    """Windowed-sinc polyphase resampler for mono int16 PCM.
+
+    The rate ratio is reduced to ``up/down`` and one Kaiser-windowed sinc
+    filter is precomputed per output phase, so every output sample is a
+    single dot product over the input neighbourhood. Blocks of any size can
+    be fed to ``process()``; ``flush()`` emits the remaining tail.
+    """
+
+    def __init__(self, src_rate: int, dst_rate: int, zero_crossings: int = 10,
+                 kaiser_beta: float = 8.0, block: int = 8192):
+        g = math.gcd(src_rate, dst_rate)
+        self.up = dst_rate // g
+        self.down = src_rate // g
+        self.block = block
+        # Low-pass just below the smaller Nyquist frequency to avoid aliasing
+        cutoff = min(1.0, dst_rate / src_rate) * 0.95
+        self.half = int(math.ceil(zero_crossings / cutoff))
+        self.offsets = np.arange(-self.half + 1, self.half + 1)
+        distance = (np.arange(self.up) / self.up)[:, None] - self.offsets[None, :]
+        window = np.i0(kaiser_beta * np.sqrt(np.clip(1 - (distance / self.half) ** 2, 0, None))) / np.i0(kaiser_beta)
+        taps = cutoff * np.sinc(cutoff * distance) * window
+        self.taps = (taps / taps.sum(axis=1, keepdims=True)).astype(np.float32)
+        # Leading zeros stand in for the signal before the first sample
+        self._pending = np.zeros(self.half, dtype=np.float32)
+        self._pending_start = -self.half
+        self._consumed = 0
+        self._next_out = 0
+
+    def _emit(self, n_end: int) -> bytes:
+        if n_end <= self._next_out:
+            return b''
+        out = np.empty(n_end - self._next_out, dtype=np.int16)
+        for start in range(self._next_out, n_end, self.block):
+            n = np.arange(start, min(start + self.block, n_end), dtype=np.int64)
+            pos = n * self.down
+            idx = (pos // self.up)[:, None] + self.offsets[None, :] - self._pending_start
+            y = np.einsum('ij,ij->i', self._pending[idx], self.taps[pos % self.up])
+            out[start - self._next_out:start - self._next_out + len(n)] = np.clip(np.rint(y), -32768, 32767)
+        self._next_out = n_end
+        # Drop input that no future output sample can reach
+        first_needed = (n_end * self.down) // self.up - self.half + 1
+        drop = max(0, first_needed - self._pending_start)
+        self._pending = self._pending[drop:]
+        self._pending_start += drop
+        return out.tobytes()
+
+    def process(self, pcm) -> bytes:
+        """Feed int16 PCM and return all output samples that are now complete"""
+        x = np.frombuffer(pcm, dtype=np.int16).astype(np.float32)
+        self._pending = np.concatenate((self._pending, x))
+        self._consumed += len(x)
+        last_input = self._pending_start + len(self._pending) - 1
+        return self._emit(((last_input - self.half + 1) * self.up + self.down - 1) // self.down)
+
+    def flush(self) -> bytes:
+        """Emit the remaining output samples, zero-padding past the end of input"""
+        self._pending = np.concatenate((self._pending, np.zeros(self.half, dtype=np.float32)))
+        return self._emit((self._consumed * self.up + self.down - 1) // self.down)
+
+
+def resample_pcm16(pcm, src_rate: int, dst_rate: int):
+    """Resample a complete mono int16 buffer; returns ``pcm`` unchanged if the rates match"""
+    if src_rate == dst_rate:
+        return pcm
+    resampler = PolyphaseResampler(src_rate, dst_rate)
+    return resampler.process(pcm) + resampler.flush()
+
+
+class VoiceActivityDetector:
+    """Frame energy / zero-crossing voice activity detector for int16 PCM.
+
+    Frames are classed as speech when their RMS level clears an adaptive
+    noise floor by ``margin_db``, or clears half that margin while having
+    a high zero-crossing rate (unvoiced fricatives). Speech regions are
+    padded by ``pad_ms`` on both sides before trimming.
+    """
+
+    def __init__(self, frame_ms: int = 30, margin_db: float = 12.0, pad_ms: int = 250, max_pause_ms: int = 0):
+        self.frame_ms = frame_ms
+        self.margin_db = margin_db
+        self.pad_ms = pad_ms
+        self.max_pause_ms = max_pause_ms
+
+    def _frames(self, samples: np.ndarray, rate: int):
+        """Per-frame ``(level_db, zero_crossing_rate, frame_length)``"""
+        frame = max(1, int(rate * self.frame_ms / 1000))
+        count = len(samples) // frame
+        frames = samples[:count * frame].reshape(count, frame).astype(np.float32)
+        level_db = 20 * np.log10(np.sqrt(np.mean(frames ** 2, axis=1)) / 32768 + 1e-9)
+        zero_crossings = np.mean(np.diff(np.signbit(frames), axis=1), axis=1)
+        return level_db, zero_crossings, frame
+
+    def speech_frames(self, samples: np.ndarray, rate: int, pad: bool = True):
+        """Return ``(mask, frame_length)`` with one speech flag per frame"""
+        level_db, zero_crossings, frame = self._frames(samples, rate)
+        if len(level_db) == 0:
+            return np.zeros(0, dtype=bool), frame
+        # Clamp the adaptive threshold so all-speech clips and dead-silent rooms both behave
+        threshold = float(np.clip(np.percentile(level_db, 10) + self.margin_db, -55.0, -38.0))
+        speech = (level_db > threshold) | ((level_db > threshold - self.margin_db / 2) & (zero_crossings > 0.3))
+        pad_frames = int(math.ceil(self.pad_ms / self.frame_ms)) if pad else 0
+        if pad_frames:
+            speech = np.convolve(speech, np.ones(2 * pad_frames + 1), mode='same') > 0
+        return speech, frame
+
+    def snr_db(self, pcm, rate: int) -> Optional[float]:
+        """Rough signal-to-noise ratio: loud (speech) frame level over the quiet-frame noise floor"""
+        level_db, _, _ = self._frames(np.frombuffer(pcm, dtype=np.int16), rate)
+        if len(level_db) < 10:
+            return None
+        return float(np.percentile(level_db, 90) - np.percentile(level_db, 10))
+
+    def find_pause(self, pcm, rate: int, min_pause_ms: int) -> Optional[int]:
+        """Sample index at the middle of the latest pause of at least ``min_pause_ms``, if any"""
+        samples = np.frombuffer(pcm, dtype=np.int16)
+        speech, frame = self.speech_frames(samples, rate, pad=False)
+        edges = np.diff(np.concatenate(([0], (~speech).astype(np.int8), [0])))
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
+        long_enough = np.flatnonzero((ends - starts) * self.frame_ms >= min_pause_ms)
+        if not len(long_enough):
+            return None
+        latest = long_enough[-1]
+        return (starts[latest] + ends[latest]) // 2 * frame
+
+    def trim(self, pcm, rate: int):
+        """Trim leading/trailing silence (and long pauses if configured).
+
+        Returns the kept PCM, a zero-copy view when only the ends are
+        trimmed, or ``None`` when no speech was found.
+        """
+        samples = np.frombuffer(pcm, dtype=np.int16)
+        speech, frame = self.speech_frames(samples, rate)
+        if not speech.any():
+            return None
+        edges = np.diff(np.concatenate(([0], speech.astype(np.int8), [0])))
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
+        last_sample = len(samples) if ends[-1] == len(speech) else ends[-1] * frame
+        if not self.max_pause_ms or len(starts) == 1:
+            return memoryview(pcm).cast('B')[starts[0] * frame * 2:last_sample * 2]
+        # Collapse each internal pause to at most max_pause_ms, keeping its middle out
+        keep = max(1, self.max_pause_ms // self.frame_ms)
+        pieces = []
+        segment_start = starts[0] * frame
+        for pause_start, pause_end in zip(ends[:-1], starts[1:]):
+            if pause_end - pause_start > keep:
+                pieces.append(samples[segment_start:(pause_start + keep // 2) * frame])
+                segment_start = (pause_end - (keep - keep // 2)) * frame
+        pieces.append(samples[segment_start:last_sample])
+        return np.concatenate(pieces).tobytes()
+
+
+class StreamingWavWriter:
+    """Incremental PCM WAV writer.
+
+    Writes a header with placeholder sizes up front, appends (optionally
+    resampled) frames as they arrive and patches the RIFF and data chunk
+    sizes on ``close()``, so finishing a file costs the same however long
+    the recording was.
+    """
+
+    HEADER = struct.Struct('<4sI4s4sIHHIIHH4sI')
+
+    def __init__(self, target, channels: int, sample_width: int, rate: int, src_rate: Optional[int] = None):
+        # ``target`` is a file path, or a seekable binary file object (e.g. BytesIO) left open on close
+        self.path = target if isinstance(target, str) else None
+        self.channels = channels
+        self.sample_width = sample_width
+        self.rate = rate
+        self.data_bytes = 0
+        self.input_bytes = 0
+        # Hash of the PCM as uploaded (after resampling), used as the transcription cache key
+        self.digest = hashlib.sha256()
+        self._resampler = PolyphaseResampler(src_rate, rate) if src_rate and src_rate != rate else None
+        self._file = open(target, 'wb') if self.path else target
+        self._file.write(self._header())
+
+    def _header(self) -> bytes:
+        block_align = self.channels * self.sample_width
+        return self.HEADER.pack(
+            b'RIFF', 36 + self.data_bytes, b'WAVE',
+            b'fmt ', 16, 1, self.channels, self.rate, self.rate * block_align, block_align, self.sample_width * 8,
+            b'data', self.data_bytes
+        )
+
+    def _append(self, data):
+        if data:
+            self._file.write(data)
+            self.digest.update(data)
+            self.data_bytes += len(data)
+
+    def write(self, pcm):
+        """Append captured PCM frames"""
+        self.input_bytes += len(pcm)
+        self._append(self._resampler.process(pcm) if self._resampler else pcm)
+
+    def close(self):
+        """Flush any resampler tail and patch the header sizes"""
+        if self._file.closed:
+            return
+        try:
+            if self._resampler:
+                self._append(self._resampler.flush())
+                self._resampler = None
+            self._file.seek(0)
+            self._file.write(self._header())
+        finally:
+            if self.path:
+                self._file.close()
+
+    @property
+    def buffer(self) -> Optional[io.BytesIO]:
+        return None if self.path else self._file
+
+
+class AudioPayload:
+    """Encoded audio ready for upload, held in memory or spilled to a temporary file"""
+
+    def __init__(self, filename: str, buffer: Optional[io.BytesIO] = None, path: Optional[str] = None,
+                 encode_seconds: float = 0.0, format: str = 'wav', source_size: Optional[int] = None,
+                 pcm_digest: Optional[str] = None):
+        self.filename = filename
+        self.buffer = buffer
+        self.path = path
+        self.encode_seconds = encode_seconds
+        self.format = format
+        # Size of the uncompressed WAV this payload was encoded from
+        self.source_size = source_size if source_size is not None else self.size
+        # SHA-256 of the PCM this payload encodes, whatever the upload format
+        self.pcm_digest = pcm_digest
+
+    @property
+    def compression_ratio(self) -> float:
+        return self.source_size / self.size if self.size else 1.0
+
+    @classmethod
+    def from_writer(cls, writer: StreamingWavWriter, encode_seconds: float = 0.0) -> 'AudioPayload':
+        return cls('recording.wav', buffer=writer.buffer, path=writer.path, encode_seconds=encode_seconds,
+                   pcm_digest=writer.digest.hexdigest())
+
+    @property
+    def storage(self) -> str:
+        return 'memory' if self.buffer is not None else 'disk'
+
+    @property
+    def size(self) -> int:
+        if self.buffer is not None:
+            return self.buffer.getbuffer().nbytes
+        return os.path.getsize(self.path)
+
+    @contextmanager
+    def open(self):
+        """Yield a value suitable for the ``file`` argument of the transcription API.
+
+        Each call gets an independent body, so hedged requests to several
+        providers can upload the same payload concurrently. The upload is
+        always named ``filename``, wherever the bytes live on disk.
+        """
+        if self.buffer is not None:
+            yield (self.filename, self.buffer.getvalue())
+        else:
+            with open(self.path, "rb") as file:
+                yield (self.filename, file)
+
+    def cleanup(self):
+        """Delete the spill file, if any"""
+        if self.path and os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+class AudioEncoder:
+    """Upload encoder stage: turns the recorded WAV payload into the format sent to the API.
+
+    The base class uploads WAV unchanged; subclasses transcode with
+    soundfile (libsndfile) or an ``ffmpeg`` binary, whichever is present.
+    """
+
+    name = 'wav'
+    extension = 'wav'
+
+    def available(self) -> bool:
+        return True
+
+    def encode(self, wav: AudioPayload) -> AudioPayload:
+        return wav
+
+    def _output_target(self, wav: AudioPayload):
+        # Spilled recordings stay on disk; in-memory ones stay in memory
+        if wav.path:
+            with tempfile.NamedTemporaryFile(suffix=f".{self.extension}", delete=False) as tmp_file:
+                return tmp_file.name
+        return io.BytesIO()
+
+    def _payload(self, wav: AudioPayload, target, started: float) -> AudioPayload:
+        return AudioPayload(
+            f"recording.{self.extension}",
+            buffer=None if isinstance(target, str) else target,
+            path=target if isinstance(target, str) else None,
+            encode_seconds=wav.encode_seconds + time.perf_counter() - started,
+            format=self.name,
+            source_size=wav.size,
+            pcm_digest=wav.pcm_digest
+        )
+
+    def _encode_soundfile(self, wav: AudioPayload, target, **kwargs):
+        if wav.buffer is not None:
+            wav.buffer.seek(0)
+        samples, rate = soundfile.read(wav.buffer if wav.buffer is not None else wav.path, dtype='int16')
+        soundfile.write(target, samples, rate, **kwargs)
+
+    def _encode_ffmpeg(self, wav: AudioPayload, target, *codec_args: str):
+        command = ['ffmpeg', '-hide_banner', '-loglevel', 'error', '-y',
+                   '-i', wav.path or 'pipe:0', *codec_args,
+                   target if isinstance(target, str) else 'pipe:1']
+        stdin = None if wav.path else wav.buffer.getvalue()
+        result = subprocess.run(command, input=stdin, capture_output=True, check=True)
+        if not isinstance(target, str):
+            target.write(result.stdout)
+
+
+class FlacEncoder(AudioEncoder):
+    """Lossless FLAC, typically around half the size of 16-bit WAV speech"""
+
+    name = 'flac'
+    extension = 'flac'
+
+    def available(self) -> bool:
+        return soundfile is not None or shutil.which('ffmpeg') is not None
+
+    def encode(self, wav: AudioPayload) -> AudioPayload:
+        started = time.perf_counter()
+        target = self._output_target(wav)
+        if soundfile is not None:
+            self._encode_soundfile(wav, target, format='FLAC', subtype='PCM_16')
+        else:
+            self._encode_ffmpeg(wav, target, '-c:a', 'flac', '-f', 'flac')
+        return self._payload(wav, target, started)
+
+
+class OpusEncoder(AudioEncoder):
+    """Low-bitrate Opus in an Ogg container"""
+
+    name = 'opus'
+    extension = 'ogg'
+
+    def __init__(self):
+        self.bitrate = os.getenv('VOICE_OPUS_BITRATE', '24k')
+
+    def available(self) -> bool:
+        return shutil.which('ffmpeg') is not None or soundfile is not None
+
+    def encode(self, wav: AudioPayload) -> AudioPayload:
+        started = time.perf_counter()
+        target = self._output_target(wav)
+        # Prefer ffmpeg here because it honours the configured bitrate
+        if shutil.which('ffmpeg'):
+            self._encode_ffmpeg(wav, target, '-c:a', 'libopus', '-b:a', self.bitrate,
+                                '-application', 'voip', '-f', 'ogg')
+        else:
+            self._encode_soundfile(wav, target, format='OGG', subtype='OPUS')
+        return self._payload(wav, target, started)
+
+
+UPLOAD_ENCODERS = {
+    'wav': AudioEncoder,
+    'flac': FlacEncoder,
+    'opus': OpusEncoder,
+}
+
+
+class ProviderStats:
+    """Rolling latency and error statistics for one transcription provider"""
+
+    def __init__(self, window: int = 50):
+        self.latencies = deque(maxlen=window)
+        # Recent outcomes (True for success), so an old outage stops counting against a provider
+        self.outcomes = deque(maxlen=window)
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.last_failure = 0.0
+        # Every latency since startup, unlike the rolling window used for ranking and hedging
+        self.histogram = LatencyHistogram()
+        self._lock = threading.Lock()
+
+    def record_success(self, latency: float):
+        self.histogram.record(latency)
+        with self._lock:
+            self.latencies.append(latency)
+            self.outcomes.append(True)
+            self.successes += 1
+            self.consecutive_failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.outcomes.append(False)
+            self.failures += 1
+            self.consecutive_failures += 1
+            self.last_failure = time.monotonic()
+
+    def percentile(self, p: float) -> Optional[float]:
+        with self._lock:
+            samples = list(self.latencies)
+        return float(np.percentile(samples, p)) if samples else None
+
+    @property
+    def error_rate(self) -> float:
+        """Share of the recent window's requests that failed"""
+        with self._lock:
+            outcomes = list(self.outcomes)
+        return outcomes.count(False) / len(outcomes) if outcomes else 0.0
+
+
+class TranscriptionBackend(abc.ABC):
+    """Base class for transcription engines.
+
+    Subclasses implement ``transcribe(file)``, where ``file`` is whatever
+    ``AudioPayload.open()`` yields, and ``from_env()``, which builds the
+    backend from the environment or returns None when it is not configured.
+    Backends are registered in ``TRANSCRIPTION_BACKENDS`` and selected with
+    ``VOICE_PROVIDERS``; ``VoiceRecorder`` only talks to this interface.
+    """
+
+    # Remote backends set this so their connection can be pre-warmed
+    base_url: Optional[str] = None
+    # Whether requests leave the machine (and so need an API key and a network)
+    remote: bool = False
+
+    def __init__(self, name: str, model: str, cost_per_minute: float):
+        self.name = name
+        self.model = model
+        self.cost_per_minute = cost_per_minute
+        # Model tiers the router can choose between: tier -> (model, cost per minute)
+        self.tiers = {'full': (model, cost_per_minute)}
+        self.stats = ProviderStats()
+
+    def resolve(self, tier: str):
+        """``(tier, model, cost_per_minute)`` actually used for a requested tier"""
+        if tier not in self.tiers:
+            tier = 'full'
+        model, cost_per_minute = self.tiers[tier]
+        return tier, model, cost_per_minute
+
+    @classmethod
+    @abc.abstractmethod
+    def from_env(cls, http_client: httpx.Client) -> Optional['TranscriptionBackend']:
+        """Build the backend from the environment, or None when it is not configured"""
+
+    @abc.abstractmethod
+    def transcribe(self, file, tier: str = 'full', timeout: Optional[float] = None) -> str:
+        """Transcribe one upload with the model of ``tier``, giving up after ``timeout`` seconds where possible"""
+
+    def close(self):
+        pass
+
+    @staticmethod
+    def read_upload(file) -> bytes:
+        """The uploaded bytes, for backends that process audio in-process"""
+        data = file[1] if isinstance(file, tuple) else file
+        return data if isinstance(data, bytes) else data.read()
+
+
+def model_cost_per_minute(model: str) -> float:
+    """List price per audio minute for a transcription model or deployment name"""
+    if 'gpt-4o-mini-transcribe' in model:
+        return 0.003  # GPT-4o-mini-transcribe: $0.003/min
+    return 0.006  # whisper-1 and GPT-4o-transcribe: $0.006/min
+
+
+class OpenAIBackend(TranscriptionBackend):
+    """The OpenAI transcription API, or any server that speaks it (``OPENAI_BASE_URL``)"""
+
+    remote = True
+
+    def __init__(self, name: str, client: OpenAI, model: str, cost_per_minute: float):
+        super().__init__(name, model, cost_per_minute)
+        self.client = client
+        self.clients = {}
+        self.base_url = str(client.base_url)
+
+    def add_tier(self, tier: str, model: str, cost_per_minute: float, client: Optional[OpenAI] = None):
+        self.tiers[tier] = (model, cost_per_minute)
+        if client is not None:
+            self.clients[tier] = client
+
+    @classmethod
+    def from_env(cls, http_client: httpx.Client) -> Optional['OpenAIBackend']:
+        if not os.getenv('OPENAI_API_KEY'):
+            return None
+        return cls.create(http_client)
+
+    @classmethod
+    def create(cls, http_client: httpx.Client) -> 'OpenAIBackend':
+        logger.info("✅ Using regular OpenAI API")
+        # Retries are the provider pool's job: it knows the deadline and can fail over instead
+        client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'), http_client=http_client, max_retries=0)
+        model = os.getenv('VOICE_OPENAI_MODEL', 'whisper-1')
+        backend = cls("OpenAI", client, model, model_cost_per_minute(model))
+        mini_model = os.getenv('VOICE_OPENAI_MINI_MODEL', 'gpt-4o-mini-transcribe')
+        if mini_model:
+            backend.add_tier('mini', mini_model, model_cost_per_minute(mini_model))
+        return backend
+
+    def transcribe(self, file, tier: str = 'full', timeout: Optional[float] = None) -> str:
+        tier, model, _ = self.resolve(tier)
+        client = self.clients.get(tier, self.client)
+        if timeout is not None:
+            # Bound the call by what is left of the caller's deadline, so an abandoned request ends too
+            connect = getattr(client.timeout, 'connect', None) or timeout
+            client = client.with_options(timeout=httpx.Timeout(timeout, connect=min(timeout, connect)))
+        return client.audio.transcriptions.create(
+            model=model,
+            file=file,
+            response_format="text"
+        )
+
+
+class AzureOpenAIBackend(OpenAIBackend):
+    """An Azure OpenAI transcription deployment"""
+
+    @classmethod
+    def from_env(cls, http_client: httpx.Client) -> Optional['AzureOpenAIBackend']:
+        azure_api_key = os.getenv('AZURE_OPENAI_API_KEY')
+        azure_endpoint = os.getenv('AZURE_OPENAI_ENDPOINT')
+        if not (azure_api_key and azure_endpoint):
+            return None
+        deployment_name = os.getenv('AZURE_OPENAI_DEPLOYMENT_NAME', 'gpt-4o-transcribe')
+        logger.info(f"✅ Using Azure OpenAI API (deployment: {deployment_name})")
+        
+        def deployment_client(deployment: str) -> OpenAI:
+            return OpenAI(
+                api_key=azure_api_key,
+                base_url=f"{azure_endpoint.rstrip('/')}/openai/deployments/{deployment}",
+                default_query={"api-version": os.getenv('AZURE_OPENAI_API_VERSION', '2025-03-01-preview')},
+                http_client=http_client,
+                max_retries=0
+            )
+        
+        client = deployment_client(deployment_name)
+        # Set pricing based on deployment model
+        if 'gpt-4o-mini-transcribe' in deployment_name:
+            cost_per_minute = 0.003  # GPT-4o-mini-transcribe: $0.003/min
+            logger.info("Using GPT-4o-mini-transcribe pricing: $0.003/minute")
+        elif 'gpt-4o-transcribe' in deployment_name:
+            cost_per_minute = 0.006  # GPT-4o-transcribe: $0.006/min
+            logger.info("Using GPT-4o-transcribe pricing: $0.006/minute")
+        else:
+            cost_per_minute = 0.006  # Default to standard rate
+            logger.info("Using default transcription pricing: $0.006/minute")
+        # The deployment in the URL picks the model; its name is sent as the model too, as AzureOpenAI does
+        backend = cls(f"Azure OpenAI ({deployment_name})", client, deployment_name, cost_per_minute)
+        mini_deployment = os.getenv('AZURE_OPENAI_MINI_DEPLOYMENT_NAME')
+        if mini_deployment:
+            logger.info(f"Short clips can be routed to Azure deployment {mini_deployment}")
+            backend.add_tier('mini', mini_deployment, model_cost_per_minute(mini_deployment),
+                             deployment_client(mini_deployment))
+        return backend
+
+
+class FaultInjector:
+    """Simulated service behaviour shared by the mock backend and the stand-in server"""
+
+    def __init__(self, latency: float = 0.2, jitter: float = 0.0, error_rate: float = 0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+
+    @classmethod
+    def from_env(cls) -> 'FaultInjector':
+        return cls(
+            latency=float(os.getenv('VOICE_MOCK_LATENCY', '0.2')),
+            jitter=float(os.getenv('VOICE_MOCK_JITTER', '0')),
+            error_rate=float(os.getenv('VOICE_MOCK_ERROR_RATE', '0'))
+        )
+
+    def delay(self):
+        time.sleep(max(0.0, self.latency + random.uniform(-self.jitter, self.jitter)))
+
+    def should_fail(self) -> bool:
+        return random.random() < self.error_rate
+
+    @staticmethod
+    def transcript(data: bytes) -> str:
+        # Deterministic per upload, so merged and cached results can be checked
+        return f"Mock transcript of {len(data):,} bytes ({hashlib.sha256(data).hexdigest()[:8]})."
+
+
+class MockBackend(TranscriptionBackend):
+    """In-process stand-in with no network: fixed latency, jitter and injected failures"""
+
+    def __init__(self, faults: FaultInjector):
+        super().__init__("Mock", "mock", 0.0)
+        self.faults = faults
+
+    @classmethod
+    def from_env(cls, http_client: httpx.Client) -> 'MockBackend':
+        faults = FaultInjector.from_env()
+        logger.info(f"✅ Using mock transcription backend ({faults.latency:.2f}s latency, "
+                    f"{faults.error_rate * 100:.0f}% errors)")
+        return cls(faults)
+
+    def transcribe(self, file, tier: str = 'full', timeout: Optional[float] = None) -> str:
+        data = self.read_upload(file)
+        self.faults.delay()
+        if self.faults.should_fail():
+            raise RuntimeError("Injected mock transcription failure")
+        return self.faults.transcript(data)
+
+
+class LocalWhisperBackend(TranscriptionBackend):
+    """Offline CPU transcription with faster-whisper (a quantized CTranslate2 Whisper).
+
+    The model is loaded once on a background thread when the recorder starts
+    and stays resident, so only the first request can wait on the load.
+    """
+
+    def __init__(self, model_name: str, compute_type: str = 'int8', cpu_threads: int = 0,
+                 workers: int = 1, beam_size: int = 1, language: Optional[str] = None):
+        super().__init__(f"Local ({model_name})", model_name, 0.0)
+        self.compute_type = compute_type
+        self.cpu_threads = cpu_threads
+        self.workers = workers
+        self.beam_size = beam_size
+        self.language = language
+        self.load_seconds = None
+        self._model = None
+        self._load_error = None
+        self._loaded = threading.Event()
+        threading.Thread(target=self._load, name="local-model-load", daemon=True).start()
+
+    @classmethod
+    def from_env(cls, http_client: httpx.Client) -> Optional['LocalWhisperBackend']:
+        if WhisperModel is None:
+            logger.warning("Local backend requested but faster-whisper is not installed (pip install faster-whisper)")
+            return None
+        backend = cls(
+            os.getenv('VOICE_LOCAL_MODEL', 'base.en'),
+            compute_type=os.getenv('VOICE_LOCAL_COMPUTE_TYPE', 'int8'),
+            cpu_threads=int(os.getenv('VOICE_LOCAL_THREADS', '0')),
+            workers=int(os.getenv('VOICE_LOCAL_WORKERS', '1')),
+            beam_size=int(os.getenv('VOICE_LOCAL_BEAM_SIZE', '1')),
+            language=os.getenv('VOICE_LOCAL_LANGUAGE') or None
+        )
+        logger.info(f"✅ Using local CPU transcription ({backend.model}, {backend.compute_type}, "
+                    f"{backend.cpu_threads or 'auto'} threads)")
+        return backend
+
+    def _load(self):
+        started = time.perf_counter()
+        try:
+            self._model = WhisperModel(self.model, device='cpu', compute_type=self.compute_type,
+                                       cpu_threads=self.cpu_threads, num_workers=self.workers)
+            self.load_seconds = time.perf_counter() - started
+            logger.info(f"🧠 Local model {self.model} loaded in {self.load_seconds:.2f}s")
+        except Exception as e:
+            self._load_error = e
+            logger.error(f"Failed to load local model {self.model}: {e}")
+        finally:
+            self._loaded.set()
+
+    @staticmethod
+    def _decode(data: bytes):
+        """16 kHz mono float32 samples for a WAV upload, or a file object for the model to decode"""
+        if data[:4] != b'RIFF':
+            return io.BytesIO(data)  # FLAC/Opus: faster-whisper decodes these itself
+        with wave.open(io.BytesIO(data), 'rb') as wf:
+            rate = wf.getframerate()
+            pcm = wf.readframes(wf.getnframes())
+        if rate != 16000:
+            pcm = resample_pcm16(pcm, rate, 16000)
+        return np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+
+    def transcribe(self, file, tier: str = 'full', timeout: Optional[float] = None) -> str:
+        # Decoding runs in-process and cannot be interrupted; the pool's deadline still applies to the caller
+        self._loaded.wait()
+        if self._model is None:
+            raise RuntimeError(f"Local model unavailable: {self._load_error}")
+        segments, _ = self._model.transcribe(self._decode(self.read_upload(file)),
+                                             beam_size=self.beam_size, language=self.language)
+        return "".join(segment.text for segment in segments)
+
+
+TRANSCRIPTION_BACKENDS = {
+    'azure': AzureOpenAIBackend,
+    'openai': OpenAIBackend,
+    'local': LocalWhisperBackend,
+    'mock': MockBackend,
+}
+
+
+class TranscriptionCancelled(Exception):
+    """Raised when the user cancels an in-flight transcription"""
+
+
+class ProviderPool:
+    """Routes each transcription across the configured providers.
+
+    Providers are ranked by recent health and median latency. The best one
+    is tried first; if it has not answered within its own latency
+    percentile a hedged request goes to the next provider, and the first
+    success wins. Failures fall through to the next provider. A losing
+    request cannot be interrupted mid-flight, so it is cancelled if it has
+    not started yet and otherwise left to finish with its result discarded.
+    """
+
+    def __init__(self, providers, hedge: bool = True, hedge_percentile: float = 95.0,
+                 hedge_min_delay: float = 1.0, hedge_default_delay: float = 4.0, cooldown: float = 60.0,
+                 retries: int = 1):
+        self.providers = list(providers)
+        self.hedge = hedge and len(self.providers) > 1
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_default_delay = hedge_default_delay
+        self.cooldown = cooldown
+        # Extra attempts per provider after a failure, once the other providers have had their turn
+        self.retries = retries
+
+    def ranked(self):
+        """Providers in routing order: healthy first, then by error rate, median latency and configured order"""
+        now = time.monotonic()
+
+        def key(item):
+            index, provider = item
+            stats = provider.stats
+            cooling_down = stats.consecutive_failures >= 3 and now - stats.last_failure < self.cooldown
+            # Error rate in 10% steps so a stray failure does not outweigh latency
+            error_band = round(stats.error_rate * 10)
+            # A provider without a successful sample has not earned a place ahead of measured ones
+            median = stats.percentile(50)
+            return (cooling_down, error_band, median if median is not None else float('inf'), index)
+
+        return [provider for _, provider in sorted(enumerate(self.providers), key=key)]
+
+    def hedge_delay(self, provider: TranscriptionBackend) -> float:
+        """How long to wait on ``provider`` before sending a hedged request elsewhere"""
+        delay = None
+        if len(provider.stats.latencies) >= 5:
+            delay = provider.stats.percentile(self.hedge_percentile)
+        return max(self.hedge_min_delay, delay if delay is not None else self.hedge_default_delay)
+
+    def _timed(self, provider: TranscriptionBackend, attempt, timeout: Optional[float]):
+        started = time.perf_counter()
+        try:
+            result = attempt(provider, timeout)
+        except Exception:
+            provider.stats.record_failure()
+            raise
+        provider.stats.record_success(time.perf_counter() - started)
+        return result
+
+    def _start(self, provider: TranscriptionBackend, attempt, timeout: Optional[float]) -> Future:
+        """Run one attempt on its own daemon thread.
+
+        A thread per attempt (not a bounded pool) means a stalled request
+        can never hold up the next one, and hedge and deadline timers never
+        include time spent queueing. A future cancelled before its thread
+        gets going skips the request.
+        """
+        future = Future()
+
+        def run():
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                future.set_result(self._timed(provider, attempt, timeout))
+            except Exception as e:
+                future.set_exception(e)
+
+        threading.Thread(target=run, name=f"provider-{provider.name}", daemon=True).start()
+        return future
+
+    def transcribe(self, attempt, timeout: Optional[float] = None, cancel: Optional[threading.Event] = None):
+        """Run ``attempt(provider)`` with failover and hedging.
+
+        ``attempt`` is called as ``attempt(provider, timeout)`` with the
+        seconds left before the deadline (None without one). Returns
+        ``(provider, result, hedged)``; raises the last error if every
+        provider failed, ``TimeoutError`` once ``timeout`` seconds have
+        passed, and ``TranscriptionCancelled`` as soon as ``cancel`` is set.
+        Abandoned requests are bounded by the same deadline and their results
+        are discarded.
+        """
+        remaining = self.ranked()
+        retries_left = {provider.name: self.retries for provider in remaining}
+        pending = {}
+        last_error = None
+        hedged = False
+        started = time.monotonic()
+        deadline = started + timeout if timeout else None
+        hedge_at = hedge_wait = None
+
+        def launch():
+            nonlocal hedge_at, hedge_wait
+            provider = remaining.pop(0)
+            time_left = max(0.1, deadline - time.monotonic()) if deadline is not None else None
+            pending[self._start(provider, attempt, time_left)] = provider
+            if self.hedge and remaining and not hedged:
+                hedge_wait = self.hedge_delay(provider)
+                hedge_at = time.monotonic() + hedge_wait
+
+        def abandon(reason: str):
+            for future, provider in pending.items():
+                if not future.cancel():
+                    logger.info(f"Discarding the in-flight request to {provider.name} ({reason})")
+
+        launch()
+        while pending:
+            if cancel is not None and cancel.is_set():
+                abandon("cancelled")
+                raise TranscriptionCancelled(f"Cancelled after {time.monotonic() - started:.2f}s")
+            now = time.monotonic()
+            if deadline is not None and now >= deadline:
+                abandon("timed out")
+                raise TimeoutError(f"No transcription within {timeout:.0f}s")
+            if hedge_at is not None and now >= hedge_at and remaining and not hedged and len(pending) == 1:
+                slow = next(iter(pending.values()))
+                hedged = True
+                launch()
+                logger.info(f"⏱️  {slow.name} slower than p{self.hedge_percentile:.0f} ({hedge_wait:.2f}s), "
+                            f"hedging with {list(pending.values())[-1].name}")
+                continue
+            wakeups = [t for t in (deadline, None if hedged else hedge_at) if t is not None]
+            wait_timeout = max(0.0, min(wakeups) - now) if wakeups else None
+            if cancel is not None:
+                wait_timeout = min(wait_timeout, 0.1) if wait_timeout is not None else 0.1
+            done, _ = wait(pending, timeout=wait_timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                provider = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    last_error = e
+                    logger.warning(f"{provider.name} failed: {e}")
+                    if retries_left[provider.name] > 0:
+                        retries_left[provider.name] -= 1
+                        remaining.append(provider)
+                    if remaining and not pending:
+                        action = "Retrying" if remaining[0] is provider else "Failing over to"
+                        logger.info(f"↪️  {action} {remaining[0].name}")
+                        launch()
+                    continue
+                abandon(f"{provider.name} answered first")
+                return provider, result, hedged
+        raise last_error
+
+    def summary(self) -> str:
+        parts = []
+        for provider in self.providers:
+            stats = provider.stats
+            p50, p95 = stats.percentile(50), stats.percentile(95)
+            latency = f"p50 {p50:.2f}s p95 {p95:.2f}s" if p50 is not None else "no data"
+            parts.append(f"{provider.name}: {latency}, {stats.error_rate * 100:.0f}% errors")
+        return "; ".join(parts)
+
+    def shutdown(self):
+        for provider in self.providers:
+            provider.close()
+
+
+class ModelRouter:
+    """Chooses the model tier for each request.
+
+    Short, clean clips go to the cheaper and faster ``mini`` tier; long or
+    noisy clips go to ``full``, as does everything while the mini tier's
+    recent median latency is over budget. Backends without a mini tier
+    always use ``full``.
+    """
+
+    def __init__(self, short_seconds: float = 30.0, min_snr_db: float = 15.0, max_mini_latency: float = 4.0):
+        self.short_seconds = short_seconds
+        self.min_snr_db = min_snr_db
+        self.max_mini_latency = max_mini_latency
+        self.stats = {'mini': ProviderStats(), 'full': ProviderStats()}
+
+    def choose(self, audio_seconds: float, snr_db: Optional[float] = None):
+        """Return ``(tier, reason)``"""
+        if audio_seconds > self.short_seconds:
+            return 'full', f"long clip ({audio_seconds:.1f}s > {self.short_seconds:.0f}s)"
+        if snr_db is not None and snr_db < self.min_snr_db:
+            return 'full', f"noisy clip ({snr_db:.0f} dB SNR < {self.min_snr_db:.0f} dB)"
+        mini = self.stats['mini']
+        mini_p50 = mini.percentile(50) if len(mini.latencies) >= 5 else None
+        if mini_p50 is not None and mini_p50 > self.max_mini_latency:
+            return 'full', f"mini tier slow recently (p50 {mini_p50:.1f}s > {self.max_mini_latency:.1f}s)"
+        return 'mini', f"short clip ({audio_seconds:.1f}s)"
+
+    def record(self, tier: str, latency: float):
+        self.stats[tier].record_success(latency)
+
+    def summary(self) -> str:
+        parts = []
+        for tier, stats in self.stats.items():
+            p50 = stats.percentile(50)
+            parts.append(f"{tier} p50 {p50:.2f}s ({stats.successes} requests)" if p50 is not None else f"{tier}: no data")
+        return "; ".join(parts)
+
+
+class TranscriptionCache:
+    """Content-addressed on-disk cache of transcripts.
+
+    Keys hash the uploaded PCM together with everything else that affects
+    the transcript (model, providers, upload format). Each entry is a small
+    text file; the least recently used entries are evicted once the store
+    exceeds ``max_bytes``.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # key -> size in bytes, least recently used first
+        self._index = OrderedDict()
+        os.makedirs(directory, exist_ok=True)
+        entries = []
+        for name in os.listdir(directory):
+            if name.endswith(".txt"):
+                stat = os.stat(os.path.join(directory, name))
+                entries.append((stat.st_mtime, name[:-4], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+        self.size = sum(self._index.values())
+
+    @staticmethod
+    def key(pcm_digest: str, **params) -> str:
+        return hashlib.sha256(f"{pcm_digest}:{json.dumps(params, sort_keys=True)}".encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.txt")
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            if key not in self._index:
+                self.misses += 1
+                return None
+            try:
+                with open(self._path(key), encoding="utf-8") as f:
+                    text = f.read()
+                os.utime(self._path(key))  # mtime doubles as the LRU timestamp across restarts
+            except OSError:
+                self.size -= self._index.pop(key)
+                self.misses += 1
+                return None
+            self._index.move_to_end(key)
+            self.hits += 1
+            return text
+
+    def put(self, key: str, text: str):
+        data = text.encode("utf-8")
+        with self._lock:
+            tmp_path = self._path(key) + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self._path(key))
+            self.size += len(data) - self._index.pop(key, 0)
+            self._index[key] = len(data)
+            while self.size > self.max_bytes and len(self._index) > 1:
+                old_key, old_size = self._index.popitem(last=False)
+                try:
+                    os.unlink(self._path(old_key))
+                except OSError:
+                    pass
+                self.size -= old_size
+
+
+class AudioMetadata:
+    """Sample-accurate audio durations for one job, tracked from capture to upload.
+
+    Wall-clock recording time also counts the start cue, stream start-up
+    and encoding; billing and throughput are based on these sample counts
+    instead.
+    """
+
+    def __init__(self, rate: int, frame_bytes: int, captured_frames: int = 0, uploaded_frames: Optional[int] = None):
+        self.rate = rate
+        self.frame_bytes = frame_bytes
+        self.captured_frames = captured_frames
+        # Frames left after silence trimming; None until the job is encoded for upload
+        self.uploaded_frames = uploaded_frames
+
+    @property
+    def captured_seconds(self) -> float:
+        return self.captured_frames / self.rate
+
+    @property
+    def uploaded_seconds(self) -> float:
+        frames = self.uploaded_frames if self.uploaded_frames is not None else self.captured_frames
+        return frames / self.rate
+
+    @property
+    def removed_seconds(self) -> float:
+        return self.captured_seconds - self.uploaded_seconds
+
+    def set_uploaded(self, pcm_bytes: int):
+        self.uploaded_frames = pcm_bytes // self.frame_bytes
+
+    def as_dict(self) -> dict:
+        return {"rate": self.rate, "frame_bytes": self.frame_bytes,
+                "captured_frames": self.captured_frames, "uploaded_frames": self.uploaded_frames}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'AudioMetadata':
+        return cls(data['rate'], data['frame_bytes'], data['captured_frames'], data['uploaded_frames'])
+
+
+class RecordingJob:
+    """A finished recording (or a live segment of one) and its capture metadata"""
+
+    def __init__(self, started_at: float, stopped_at: float, rate: int, frame_bytes: int,
+                 pcm=None, writer: Optional[StreamingWavWriter] = None,
+                 first_sample_latency: Optional[float] = None, preroll_seconds: float = 0.0,
+                 dropped_chunks: int = 0, segment_index: Optional[int] = None,
+                 chunk_index: Optional[int] = None):
+        self.seq = None
+        self.segment_index = segment_index
+        self.chunk_index = chunk_index
+        # Futures for segments already transcribed while recording (streaming mode)
+        self.segments = []
+        # The whole recording when ``pcm`` is only its tail after live segments
+        self.recording_pcm = None
+        self.started_at = started_at
+        self.stopped_at = stopped_at
+        self.rate = rate
+        self.frame_bytes = frame_bytes
+        self.pcm = pcm
+        self.writer = writer
+        self.first_sample_latency = first_sample_latency
+        self.preroll_seconds = preroll_seconds
+        self.dropped_chunks = dropped_chunks
+        captured = self.captured_bytes if pcm is not None or writer is not None else 0
+        self.audio = AudioMetadata(rate, frame_bytes, captured // frame_bytes)
+        # Noise estimate of the captured audio, for model routing
+        self.snr_db = None
+        self.spooled = False
+        # Set by the cancel hotkey; shared by the live segments and chunks of one recording
+        self.cancel = None
+        # Shared by the live segments and chunks of one recording, so its usage records can be grouped
+        self.recording_id = None
+        # Stage timings from hotkey to paste
+        self.trace = LatencyTrace()
+        # Success records held back until the paste, so they carry its stages
+        self.usage_records = []
+        self.enqueued_at = None
+        self.queue_wait = 0.0
+
+    @property
+    def label(self) -> str:
+        if self.chunk_index is not None:
+            return f"chunk {self.chunk_index + 1}"
+        return f"segment {self.segment_index + 1}" if self.segment_index is not None else f"#{self.seq}"
+
+    @property
+    def is_whole_recording(self) -> bool:
+        """False for chunks, live segments and a tail whose segments went separately; their failures
+        are raised to the recording, which is spooled once as a whole"""
+        return self.chunk_index is None and self.segment_index is None and not self.segments
+
+    @property
+    def captured_bytes(self) -> int:
+        return self.writer.input_bytes if self.writer is not None else len(self.pcm)
+
+    @property
+    def captured_seconds(self) -> float:
+        return self.captured_bytes / self.frame_bytes / self.rate
+
+
+def _normalize_word(word: str) -> str:
+    return ''.join(ch for ch in word.lower() if ch.isalnum())
+
+
+# Fast conversational speech; bounds how many words a chunk overlap can contain
+SPOKEN_WORDS_PER_SECOND = 3
+
+
+def merge_overlapping_transcripts(texts, max_overlap_words: int = 8, max_edge_words: int = 2) -> str:
+    """Join transcripts of overlapping audio windows, dropping words repeated in each overlap.
+
+    For each neighbouring pair the longest run of words at the end of the
+    first text that (mostly) matches the start of the second is treated as
+    the overlap. ``max_overlap_words`` should be what the audio overlap can
+    hold, so a phrase repeated further into the next text is never taken
+    for the overlap. The overlap and any discarded edge words also take up
+    at most half of either text and leave words of both, so two short,
+    similar transcripts are never collapsed into one; runs of up to three
+    words must match exactly.
+    Up to ``max_edge_words`` words at either edge may be discarded, since
+    words cut by a window boundary are often garbled. Ties are broken
+    deterministically, so the same inputs always merge the same way; pairs
+    with no credible overlap are simply concatenated.
+    """
+    merged = []
+    # Words the previous text contributed to ``merged``
+    previous = 0
+    for text in texts:
+        words = text.split()
+        if not merged:
+            merged = words
+            previous = len(words)
+            continue
+        left = [_normalize_word(w) for w in merged[-(max_overlap_words + max_edge_words):]]
+        right = [_normalize_word(w) for w in words[:max_overlap_words + max_edge_words]]
+        best = None
+        for drop_left in range(max_edge_words + 1):
+            for drop_right in range(max_edge_words + 1):
+                limit = min(len(left) - drop_left, len(right) - drop_right, max_overlap_words,
+                            (previous + 1) // 2 - drop_left, (len(words) + 1) // 2 - drop_right,
+                            previous - drop_left - 1, len(words) - drop_right - 1)
+                for k in range(1, limit + 1):
+                    a = left[len(left) - drop_left - k:len(left) - drop_left]
+                    b = right[drop_right:drop_right + k]
+                    matches = sum(1 for x, y in zip(a, b) if x and x == y)
+                    if matches < (k if k <= 3 else 0.8 * k) or (k == 1 and len(a[0]) < 4):
+                        # A lone short word ("the", "and") is not evidence of an overlap
+                        continue
+                    score = (matches, -(drop_left + drop_right), k)
+                    if best is None or score > best[0]:
+                        best = (score, drop_left, drop_right, k)
+        if best is None:
+            merged = merged + words
+            previous = len(words)
+        else:
+            _, drop_left, drop_right, k = best
+            merged = merged[:len(merged) - drop_left] + words[drop_right + k:]
+            previous = len(words) - drop_right - k
+    return ' '.join(merged)
+
+
+class LiveSegmenter:
+    """Cuts an in-progress recording at pauses so segments transcribe while recording continues.
+
+    A polling thread watches the capture buffer; once at least
+    ``min_segment_seconds`` are pending it looks for a pause of
+    ``min_pause_ms`` after that point and submits everything up to the
+    middle of the pause. Segments are forced at ``max_segment_seconds``
+    if the speaker never pauses.
+    """
+
+    def __init__(self, buffer: PCMBuffer, rate: int, frame_bytes: int, vad: VoiceActivityDetector, submit,
+                 min_segment_seconds: float = 8.0, max_segment_seconds: float = 30.0,
+                 min_pause_ms: int = 400, poll_interval: float = 0.5):
+        self.buffer = buffer
+        self.rate = rate
+        self.frame_bytes = frame_bytes
+        self.vad = vad
+        self._submit = submit
+        self.min_bytes = int(min_segment_seconds * rate) * frame_bytes
+        self.max_bytes = int(max_segment_seconds * rate) * frame_bytes
+        self.min_pause_ms = min_pause_ms
+        self.poll_interval = poll_interval
+        self.cut = 0
+        self.segments = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="live-segmenter", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self._maybe_cut()
+            except Exception as e:
+                logger.error(f"Live segmentation error: {e}")
+
+    def _maybe_cut(self):
+        view = self.buffer.getbuffer()
+        pending = len(view) - self.cut
+        if pending < self.min_bytes:
+            return
+        search_from = self.cut + self.min_bytes
+        pause = self.vad.find_pause(view[search_from:], self.rate, self.min_pause_ms)
+        if pause is not None:
+            end = search_from + pause * self.frame_bytes
+        elif pending >= self.max_bytes:
+            end = self.cut + self.max_bytes
+        else:
+            return
+        index = len(self.segments)
+        logger.info(f"✂️  Live segment {index + 1}: {(end - self.cut) / self.frame_bytes / self.rate:.1f}s sent while recording")
+        self.segments.append(self._submit(view[self.cut:end], index, self.cut))
+        self.cut = end
+
+    def finish(self):
+        """Stop watching; returns ``(tail_offset, segment_futures)``"""
+        self._stop.set()
+        self._thread.join()
+        return self.cut, self.segments
+
+
+class TranscriptionPipeline:
+    """Worker pool that processes recordings off the hotkey thread.
+
+    Jobs are numbered on submission and may finish in any order; results
+    are held back until every earlier job has been delivered, so pastes
+    always land in the order the recordings were made.
+    """
+
+    def __init__(self, process, deliver, workers: int = 2):
+        self._process = process
+        self._deliver = deliver
+        self._queue = queue.Queue()
+        self._submit_lock = threading.Lock()
+        self._delivery_lock = threading.Lock()
+        self._next_seq = 0
+        self._next_delivery = 0
+        self._finished = {}
+        self._workers = [
+            threading.Thread(target=self._work, name=f"transcriber-{i}", daemon=True)
+            for i in range(max(1, workers))
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    @property
+    def depth(self) -> int:
+        """Recordings submitted but not yet delivered"""
+        return self._next_seq - self._next_delivery
+
+    def submit(self, job: RecordingJob):
+        with self._submit_lock:
+            job.seq = self._next_seq
+            self._next_seq += 1
+        job.enqueued_at = time.perf_counter()
+        self._queue.put(job)
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                break
+            job.queue_wait = time.perf_counter() - job.enqueued_at
+            try:
+                result = self._process(job)
+            except Exception as e:
+                logger.error(f"Error processing recording #{job.seq}: {e}")
+                result = None
+            self._complete(job, result)
+
+    def _complete(self, job: RecordingJob, result):
+        with self._delivery_lock:
+            self._finished[job.seq] = (job, result)
+            while self._next_delivery in self._finished:
+                ready_job, ready_result = self._finished.pop(self._next_delivery)
+                try:
+                    self._deliver(ready_job, ready_result)
+                except Exception as e:
+                    logger.error(f"Error delivering recording #{ready_job.seq}: {e}")
+                self._next_delivery += 1
+
+    def shutdown(self, wait: bool = True):
+        """Stop the workers once queued recordings have been processed"""
+        for _ in self._workers:
+            self._queue.put(None)
+        if wait:
+            for worker in self._workers:
+                worker.join()
+
+
+USAGE_STORE_PATH = "voice_recorder_usage.db"
+
+
+class UsageStore:
+    """Indexed SQLite copy of the usage log for fast aggregate queries.
+
+    Every record's key fields are kept in ``usage`` (the JSONL log stays
+    the full-detail source), indexed by timestamp and by
+    day and latency (per provider too) so percentiles are index lookups.
+    ``daily`` is a per-day, per-provider rollup maintained on insert, so
+    cost and audio totals never need a scan of the raw records. Its
+    ``requests`` are API calls, while ``failures`` and ``cancelled`` count
+    recordings: the chunks and live segments of one recording share a
+    ``recording_id``, and ``outcomes`` remembers which were already counted.
+
+    ``created`` is set when the schema was (re)built by this open, meaning
+    the JSONL history still has to be imported; ``read_only`` opens an
+    existing database without creating or changing anything.
+    """
+
+    SCHEMA_VERSION = 3
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS usage (
+            id INTEGER PRIMARY KEY,
+            ts REAL NOT NULL,
+            day TEXT NOT NULL,
+            provider TEXT,
+            status TEXT NOT NULL,
+            model TEXT,
+            audio_seconds REAL,
+            api_seconds REAL,
+            cost_usd REAL
+        );
+        CREATE INDEX IF NOT EXISTS usage_ts ON usage (ts);
+        CREATE INDEX IF NOT EXISTS usage_day_latency ON usage (day, api_seconds);
+        CREATE INDEX IF NOT EXISTS usage_provider_day_latency ON usage (provider, day, api_seconds);
+        CREATE TABLE IF NOT EXISTS daily (
+            day TEXT NOT NULL,
+            provider TEXT NOT NULL,
+            requests INTEGER NOT NULL,
+            failures INTEGER NOT NULL,
+            cancelled INTEGER NOT NULL,
+            audio_seconds REAL NOT NULL,
+            cost_usd REAL NOT NULL,
+            PRIMARY KEY (day, provider)
+        );
+        CREATE TABLE IF NOT EXISTS outcomes (
+            day TEXT NOT NULL,
+            provider TEXT NOT NULL,
+            recording TEXT NOT NULL,
+            status TEXT NOT NULL,
+            PRIMARY KEY (day, provider, recording, status)
+        ) WITHOUT ROWID;
+    """
+
+    def __init__(self, path: str, read_only: bool = False):
+        self.path = path
+        self.created = False
+        self._lock = threading.Lock()
+        if read_only:
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"Usage store not found: {path}")
+            self._db = sqlite3.connect(f"file:{urllib.request.pathname2url(os.path.abspath(path))}?mode=ro",
+                                       uri=True, check_same_thread=False)
+            return
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        if self._db.execute("PRAGMA user_version").fetchone()[0] != self.SCHEMA_VERSION:
+            # New file or an older layout: rebuild it, the JSONL log is the source of truth
+            with self._db:
+                self._db.execute("DROP TABLE IF EXISTS usage")
+                self._db.execute("DROP TABLE IF EXISTS daily")
+                self._db.execute("DROP TABLE IF EXISTS outcomes")
+            self._db.executescript(self.SCHEMA)
+            self._db.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+            self.created = True
+
+    @staticmethod
+    def _row(record: dict):
+        timestamp = datetime.fromisoformat(record['timestamp'])
+        audio_seconds = None
+        if record.get('status', 'ok') == 'ok' and not record.get('cache_hit'):
+            # Records from before upload sizes were logged only carry the recording length
+            audio_seconds = record.get('audio_uploaded_seconds', record.get('recording_duration_seconds'))
+        return (
+            timestamp.timestamp(), record['timestamp'][:10], record.get('api_provider') or 'unknown',
+            record.get('status', 'ok'), record.get('model'), audio_seconds,
+            record.get('api_response_time_seconds'), record.get('estimated_cost_usd') or 0.0
+        )
+
+    def insert(self, records):
+        """Add a batch of usage records in one transaction"""
+        rows = [self._row(record) for record in records]
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT INTO usage (ts, day, provider, status, model, audio_seconds, api_seconds, cost_usd) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            rollup = []
+            for record, (_, day, provider, status, _, audio_seconds, _, cost) in zip(records, rows):
+                failed, cancelled = status not in ('ok', 'cancelled'), status == 'cancelled'
+                if (failed or cancelled) and record.get('recording_id'):
+                    # Count a recording once however many of its chunks or segments failed
+                    cursor = self._db.execute("INSERT OR IGNORE INTO outcomes VALUES (?, ?, ?, ?)",
+                                              (day, provider, record['recording_id'], status))
+                    failed, cancelled = failed and cursor.rowcount == 1, cancelled and cursor.rowcount == 1
+                rollup.append((day, provider, int(failed), int(cancelled), audio_seconds or 0.0, cost))
+            self._db.executemany(
+                "INSERT INTO daily (day, provider, requests, failures, cancelled, audio_seconds, cost_usd) "
+                "VALUES (?, ?, 1, ?, ?, ?, ?) "
+                "ON CONFLICT (day, provider) DO UPDATE SET requests = requests + 1, "
+                "failures = failures + excluded.failures, cancelled = cancelled + excluded.cancelled, "
+                "audio_seconds = audio_seconds + excluded.audio_seconds, cost_usd = cost_usd + excluded.cost_usd",
+                rollup)
+
+    def import_jsonl(self, path: str) -> int:
+        """Load an existing usage log, rotated segments included; returns the number of records imported"""
+        count = 0
+        batch = []
+        for record in iter_usage_records(path):
+            batch.append(record)
+            if len(batch) >= 5000:
+                self.insert(batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            self.insert(batch)
+            count += len(batch)
+        return count
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM usage").fetchone()[0]
+
+    @staticmethod
+    def _provider_filter(where: str, params: list, provider: Optional[str]):
+        # Azure is logged as "Azure OpenAI (<deployment>)"; the bare name covers every deployment
+        if provider:
+            where += " AND (provider = ? OR provider LIKE ? || ' (%')"
+            params += [provider, provider]
+        return where, params
+
+    def _latency_percentiles(self, day: str, provider: Optional[str], percentiles):
+        # Counts and ranks come straight off the latency indexes, without touching the table
+        where, params = self._provider_filter("day = ? AND api_seconds IS NOT NULL", [day], provider)
+        count = self._db.execute(f"SELECT COUNT(*) FROM usage WHERE {where}", params).fetchone()[0]
+        values = []
+        for p in percentiles:
+            if not count:
+                values.append(None)
+                continue
+            offset = min(count - 1, int(round(p / 100 * (count - 1))))
+            row = self._db.execute(f"SELECT api_seconds FROM usage WHERE {where} ORDER BY api_seconds "
+                                   f"LIMIT 1 OFFSET ?", params + [offset]).fetchone()
+            values.append(row[0] if row else None)
+        return values
+
+    def daily_stats(self, since_day: str, provider: Optional[str] = None):
+        """Per-day rows: ``(day, requests, failures, cancelled, audio_minutes, cost_usd, p50_seconds, p95_seconds)``"""
+        where, params = self._provider_filter("day >= ?", [since_day], provider)
+        with self._lock:
+            days = self._db.execute(
+                f"SELECT day, SUM(requests), SUM(failures), SUM(cancelled), SUM(audio_seconds), SUM(cost_usd) "
+                f"FROM daily WHERE {where} GROUP BY day ORDER BY day", params).fetchall()
+            return [(day, requests, failures, cancelled, audio_seconds / 60, cost,
+                     *self._latency_percentiles(day, provider, (50, 95)))
+                    for day, requests, failures, cancelled, audio_seconds, cost in days]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def usage_log_segments(path: str):
+    """Rotated segments of a usage log, oldest first"""
+    directory = os.path.dirname(path) or "."
+    active = os.path.basename(path)
+    prefix = os.path.splitext(active)[0] + "."
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return []
+    # Segment names embed their rotation time, so name order is age order
+    return sorted(os.path.join(directory, name) for name in names
+                  if name != active and name.startswith(prefix) and name.endswith((".jsonl.gz", ".jsonl")))
+
+
+def iter_usage_records(path: str):
+    """Stream every record of a usage log: rotated segments oldest first, then the active file"""
+    for segment in usage_log_segments(path) + [path]:
+        opener = gzip.open if segment.endswith(".gz") else open
+        try:
+            with opener(segment, "rt", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+        except (OSError, EOFError) as e:
+            # A truncated gzip segment still yields the records before the damage
+            if os.path.exists(segment):
+                logger.warning(f"Stopped reading {segment}: {e}")
+
+
+class UsageLogWriter:
+    """Background JSONL writer for usage records.
+
+    ``write()`` only timestamps and enqueues the record, so logging never
+    delays a paste. A writer thread serialises records in batches and
+    appends them every ``flush_interval`` seconds, as soon as
+    ``batch_size`` records are waiting, and on ``close()``. With
+    ``fsync`` on, each batch is forced to disk before the next is taken,
+    so a crash loses at most the records of one interval.
+
+    Once the active file exceeds ``max_bytes`` or ``rotate_seconds`` of age
+    it is renamed to a timestamped segment, folded into the daily summary
+    (``<name>.summary.json``) and gzipped. Segments older than
+    ``retention_seconds`` are deleted; the summary is kept.
+    """
+
+    def __init__(self, path: str, flush_interval: float = 1.0, batch_size: int = 64, fsync: bool = True,
+                 store: Optional['UsageStore'] = None, max_bytes: int = 0, rotate_seconds: float = 0,
+                 retention_seconds: float = 0):
+        self.path = path
+        # Optional indexed copy of every record, written in the same batches
+        self.store = store
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.fsync = fsync
+        self.max_bytes = max_bytes
+        self.rotate_seconds = rotate_seconds
+        self.retention_seconds = retention_seconds
+        self.summary_path = os.path.splitext(path)[0] + ".summary.json"
+        self.records_written = 0
+        self.batches_written = 0
+        self.rotations = 0
+        # Time spent inside write() by callers, in seconds: the latency logging adds to the critical path
+        self.enqueue_latencies = deque(maxlen=1000)
+        self._opened_at = self._first_timestamp()
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="usage-log", daemon=True)
+        self._thread.start()
+
+    def write(self, record: dict):
+        started = time.perf_counter()
+        self._queue.put(record)
+        self.enqueue_latencies.append(time.perf_counter() - started)
+
+    def _run(self):
+        self._maybe_rotate()
+        if self.store is not None and self.store.created:
+            self._import_history()
+        closing = False
+        while not closing:
+            batch = []
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    record = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if record is None:
+                    closing = True
+                    break
+                batch.append(record)
+            if batch:
+                self._flush(batch)
+                self._maybe_rotate()
+
+    def _flush(self, batch):
+        try:
+            with open(self.path, "a", encoding="utf-8") as log_f:
+                log_f.write("".join(json.dumps(record) + "\n" for record in batch))
+                if self.fsync:
+                    log_f.flush()
+                    os.fsync(log_f.fileno())
+            self.records_written += len(batch)
+            self.batches_written += 1
+        except Exception as e:
+            logger.error(f"Failed to write {len(batch)} usage record(s) to {self.path}: {e}")
+        if self.store is not None:
+            try:
+                self.store.insert(batch)
+            except Exception as e:
+                logger.error(f"Failed to add {len(batch)} usage record(s) to {self.store.path}: {e}")
+
+    def _import_history(self):
+        # A fresh store starts from the existing log; queued records are written after it, so none count twice
+        started = time.perf_counter()
+        try:
+            imported = self.store.import_jsonl(self.path)
+        except Exception as e:
+            logger.error(f"Failed to import {self.path} into {self.store.path}: {e}")
+            return
+        if imported:
+            logger.info(f"🗄️  Imported {imported:,} usage records into {self.store.path} "
+                        f"in {time.perf_counter() - started:.2f}s")
+
+    def _first_timestamp(self) -> Optional[float]:
+        # Age of the active file is the time of its first record, which survives restarts
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return datetime.fromisoformat(json.loads(f.readline())['timestamp']).timestamp()
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _maybe_rotate(self):
+        if self._opened_at is None:
+            self._opened_at = self._first_timestamp()
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            size = 0
+        too_big = self.max_bytes and size >= self.max_bytes
+        too_old = (self.rotate_seconds and size and self._opened_at is not None
+                   and time.time() - self._opened_at >= self.rotate_seconds)
+        if too_big or too_old:
+            segment = f"{os.path.splitext(self.path)[0]}.{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}.jsonl"
+            try:
+                os.replace(self.path, segment)
+                self._opened_at = None
+                self.rotations += 1
+            except OSError as e:
+                logger.error(f"Failed to rotate {self.path}: {e}")
+        # Also finishes segments left uncompressed by a crash mid-rotation
+        for segment in usage_log_segments(self.path):
+            if segment.endswith(".jsonl"):
+                self._compact(segment)
+        if self.retention_seconds:
+            self._expire()
+
+    def _compact(self, segment: str):
+        """Fold a rotated segment into the daily summary, then gzip it"""
+        try:
+            self._summarize(segment)
+            with open(segment, "rb") as src, gzip.open(segment + ".gz.tmp", "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            # Expiry goes by mtime, so the compressed copy keeps the segment's last-write time
+            shutil.copystat(segment, segment + ".gz.tmp")
+            os.replace(segment + ".gz.tmp", segment + ".gz")
+            os.remove(segment)
+        except OSError as e:
+            logger.error(f"Failed to compact {segment}: {e}")
+
+    def load_summary(self) -> dict:
+        try:
+            with open(self.summary_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _summarize(self, segment: str):
+        summary = self.load_summary()
+        # The summary remembers folded segments so a retried compaction never counts twice
+        folded = summary.setdefault('segments', [])
+        name = os.path.basename(segment)
+        if name in folded:
+            return
+        days = summary.setdefault('days', {})
+        with open(segment, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    day = days.setdefault(record['timestamp'][:10], {
+                        'requests': 0, 'failures': 0, 'cancelled': 0, 'audio_seconds': 0.0,
+                        'cost_usd': 0.0, 'api_seconds': 0.0, 'api_max_seconds': 0.0
+                    })
+                except (ValueError, KeyError):
+                    continue
+                day['requests'] += 1
+                status = record.get('status', 'ok')
+                if status == 'cancelled':
+                    day['cancelled'] += 1
+                elif status != 'ok':
+                    day['failures'] += 1
+                else:
+                    day['audio_seconds'] += record.get('audio_uploaded_seconds') or 0.0
+                day['cost_usd'] += record.get('estimated_cost_usd') or 0.0
+                api_seconds = record.get('api_response_time_seconds') or 0.0
+                day['api_seconds'] += api_seconds
+                day['api_max_seconds'] = max(day['api_max_seconds'], api_seconds)
+        folded.append(name)
+        del folded[:-100]
+        tmp_path = self.summary_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.summary_path)
+
+    def _expire(self):
+        cutoff = time.time() - self.retention_seconds
+        for segment in usage_log_segments(self.path):
+            try:
+                if segment.endswith(".gz") and os.path.getmtime(segment) < cutoff:
+                    os.remove(segment)
+                    logger.info(f"🗒️  Removed expired usage log segment {os.path.basename(segment)}")
+            except OSError as e:
+                logger.error(f"Failed to remove {segment}: {e}")
+
+    def enqueue_percentile_us(self, p: float) -> Optional[float]:
+        samples = list(self.enqueue_latencies)
+        return float(np.percentile(samples, p)) * 1e6 if samples else None
+
+    def close(self):
+        """Flush everything still queued and stop the writer thread"""
+        self._queue.put(None)
+        self._thread.join()
+        if self.store is not None:
+            self.store.close()
+        p99 = self.enqueue_percentile_us(99)
+        if p99 is not None:
+            logger.info(f"🗒️  Usage log: {self.records_written} record(s) in {self.batches_written} batch(es); "
+                        f"logging added p99 {p99:.1f} µs per record to the transcription path")
+
+
+class TranscriptionSpool:
+    """Durable on-disk queue for uploads whose transcription failed.
+
+    Each entry is the encoded upload plus a JSON sidecar holding the
+    recording metadata and retry state. A background thread retries due
+    entries with exponential backoff and jitter, hands successes to
+    ``deliver`` and drops entries once they exceed the age limit or the
+    spool exceeds its disk quota (oldest first). Entries survive restarts.
+    """
+
+    def __init__(self, directory: str, retry, deliver, max_bytes: int, max_age_seconds: float,
+                 base_delay: float = 15.0, max_delay: float = 900.0):
+        self.directory = directory
+        self._retry = retry
+        self._deliver = deliver
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._retry_all = False
+        self._stop = threading.Event()
+        self._thread = None
+        os.makedirs(directory, exist_ok=True)
+
+    def _meta_path(self, entry_id: str) -> str:
+        return os.path.join(self.directory, f"{entry_id}.json")
+
+    def _save(self, entry: dict):
+        # Write-then-rename so a crash never leaves a truncated sidecar
+        tmp_path = self._meta_path(entry['id']) + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, self._meta_path(entry['id']))
+
+    def _remove(self, entry: dict):
+        for path in (os.path.join(self.directory, entry['audio_file']), self._meta_path(entry['id'])):
+            if os.path.exists(path):
+                os.unlink(path)
+
+    def __len__(self) -> int:
+        return sum(1 for name in os.listdir(self.directory) if name.endswith(".json"))
+
+    def entries(self):
+        """Spooled entries, oldest first"""
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.directory, name), encoding="utf-8") as f:
+                    entries.append(json.load(f))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable spool entry {name}: {e}")
+        return sorted(entries, key=lambda entry: entry['created_at'])
+
+    def _entry_size(self, entry: dict) -> int:
+        path = os.path.join(self.directory, entry['audio_file'])
+        return os.path.getsize(path) if os.path.exists(path) else 0
+
+    def add(self, audio: AudioPayload, metadata: dict, error: str) -> bool:
+        """Keep a failed upload for retry; returns False if it cannot be spooled"""
+        if audio.size > self.max_bytes:
+            logger.warning(f"Upload of {audio.size:,} bytes exceeds the spool quota; not keeping it")
+            return False
+        entry_id = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{os.urandom(4).hex()}"
+        # Keep the upload's extension (Opus travels as .ogg), not the encoder name
+        audio_file = entry_id + os.path.splitext(audio.filename)[1]
+        audio_path = os.path.join(self.directory, audio_file)
+        with self._lock:
+            if audio.buffer is not None:
+                with open(audio_path, "wb") as f:
+                    f.write(audio.buffer.getbuffer())
+            else:
+                # The spool takes ownership of the temp file; cleanup() then finds nothing to delete
+                shutil.move(audio.path, audio_path)
+            entry = dict(metadata, id=entry_id, audio_file=audio_file, filename=audio.filename,
+                         format=audio.format, created_at=time.time(), attempts=0,
+                         next_attempt=time.time() + self._backoff(0), last_error=error)
+            self._save(entry)
+            self._enforce_limits()
+        logger.info(f"💾 Spooled failed upload to {audio_path}; retrying in the background")
+        self._wake.set()
+        return True
+
+    def _backoff(self, attempts: int) -> float:
+        # Exponential backoff with "equal jitter": half fixed, half random, so retries never synchronize
+        delay = min(self.max_delay, self.base_delay * 2 ** attempts)
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def _enforce_limits(self):
+        entries = self.entries()
+        now = time.time()
+        sizes = {entry['id']: self._entry_size(entry) for entry in entries}
+        total = sum(sizes.values())
+        for entry in entries:
+            expired = now - entry['created_at'] > self.max_age_seconds
+            if expired or total > self.max_bytes:
+                reason = "expired" if expired else "over disk quota"
+                logger.warning(f"🗑️  Dropping spooled recording {entry['id']} ({reason}, "
+                               f"{entry['attempts']} attempts, last error: {entry['last_error']})")
+                self._remove(entry)
+                total -= sizes[entry['id']]
+
+    def retry_now(self):
+        """Make every entry due immediately, e.g. once the API is reachable again"""
+        self._retry_all = True
+        self._wake.set()
+
+    def start(self):
+        pending = len(self.entries())
+        if pending:
+            logger.info(f"💾 {pending} spooled recording(s) waiting for retry in {self.directory}")
+        self._thread = threading.Thread(target=self._run, name="spool-retry", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            with self._lock:
+                self._enforce_limits()
+                entries = self.entries()
+            retry_all, self._retry_all = self._retry_all, False
+            now = time.time()
+            for entry in entries:
+                if self._stop.is_set():
+                    return
+                if retry_all or entry['next_attempt'] <= now:
+                    self._attempt(entry)
+            entries = self.entries()
+            timeout = min((entry['next_attempt'] for entry in entries), default=now + 60) - time.time()
+            self._wake.wait(timeout=min(60.0, max(0.0, timeout)))
+            self._wake.clear()
+
+    def _attempt(self, entry: dict):
+        entry['attempts'] += 1
+        logger.info(f"🔁 Retrying spooled recording {entry['id']} (attempt {entry['attempts']})")
+        try:
+            text = self._retry(os.path.join(self.directory, entry['audio_file']), entry)
+        except Exception as e:
+            entry['last_error'] = str(e)
+            entry['next_attempt'] = time.time() + self._backoff(entry['attempts'])
+            logger.warning(f"Spooled recording {entry['id']} failed again; next attempt in "
+                           f"{entry['next_attempt'] - time.time():.0f}s")
+            with self._lock:
+                if os.path.exists(self._meta_path(entry['id'])):
+                    self._save(entry)
+            return
+        with self._lock:
+            self._remove(entry)
+        try:
+            self._deliver(entry, text)
+        except Exception as e:
+            logger.error(f"Error delivering spooled recording {entry['id']}: {e}")
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+
+def notify(title: str, message: str):
+    """Show a desktop notification, best effort"""
+    system = platform.system()
+    try:
+        if system == "Darwin":
+            script = f'display notification {json.dumps(message, ensure_ascii=False)} with title {json.dumps(title, ensure_ascii=False)}'
+            subprocess.run(['osascript', '-e', script], check=True, capture_output=True, timeout=5)
+        elif system == "Linux" and shutil.which('notify-send'):
+            subprocess.run(['notify-send', title, message], check=True, capture_output=True, timeout=5)
+        else:
+            logger.info(f"🔔 {title}: {message}")
+    except Exception as e:
+        logger.debug(f"Notification failed: {e}")
+
+
 class VoiceRecorder:
     def __init__(self):
         logger.info("Initializing VoiceRecorder...")
         
         # Initialize usage log file
         self.log_file = "voice_recorder_usage.jsonl"
+        # SQLite copy of the log behind `voice-recorder stats`
+        usage_store = None
+        if env_flag('VOICE_USAGE_STORE', True):
+            try:
+                usage_store = UsageStore(USAGE_STORE_PATH)
+            except sqlite3.Error as e:
+                logger.warning(f"Usage store unavailable, logging to JSONL only: {e}")
+        self.usage_log = UsageLogWriter(
+            self.log_file,
+            flush_interval=float(os.getenv('VOICE_LOG_FLUSH_INTERVAL', '1.0')),
+            batch_size=int(os.getenv('VOICE_LOG_BATCH_SIZE', '64')),
+            fsync=env_flag('VOICE_LOG_FSYNC', True),
+            store=usage_store,
+            max_bytes=int(float(os.getenv('VOICE_LOG_MAX_MB', '10')) * 1024 * 1024),
+            rotate_seconds=float(os.getenv('VOICE_LOG_ROTATE_DAYS', '7')) * 86400,
+            retention_seconds=float(os.getenv('VOICE_LOG_RETENTION_DAYS', '90')) * 86400
+        )
         
-        # Check if Azure OpenAI credentials are provided
-        azure_api_key = os.getenv('AZURE_OPENAI_API_KEY')
-        azure_endpoint = os.getenv('AZURE_OPENAI_ENDPOINT')
+        # Keep API connections alive between dictations and pre-warm them when recording starts
+        self.keepalive_seconds = float(os.getenv('VOICE_KEEPALIVE_SECONDS', '120'))
+        self.prewarm_connection = env_flag('VOICE_PREWARM_CONNECTION', True)
+        self.connection_tracer = ConnectionTracer()
+        # No single stalled request may hold up a transcription for longer than these
+        self.connect_timeout = float(os.getenv('VOICE_CONNECT_TIMEOUT', '10'))
+        self.read_timeout = float(os.getenv('VOICE_READ_TIMEOUT', '180'))
+        self.total_timeout = float(os.getenv('VOICE_TOTAL_TIMEOUT', '300'))
+        self.http_client = build_http_client(self.connection_tracer, self.keepalive_seconds,
+                                             self.connect_timeout, self.read_timeout)
+        # Cmd+Esc sets the current event, cancelling every recording submitted under it
+        self._cancel_event = threading.Event()
+        self.cancelled_count = 0
+        self.timed_out_count = 0
+        self._last_http_activity = 0.0
         
-        if azure_api_key and azure_endpoint:
-            deployment_name = os.getenv('AZURE_OPENAI_DEPLOYMENT_NAME', 'gpt-4o-transcribe')
-            logger.info(f"✅ Using Azure OpenAI API (deployment: {deployment_name})")
-            self.api_provider = f"Azure OpenAI ({deployment_name})"
-            self.client = OpenAI(
-                api_key=azure_api_key,
-                base_url=f"{azure_endpoint.rstrip('/')}/openai/deployments/{deployment_name}",
-                default_query={"api-version": os.getenv('AZURE_OPENAI_API_VERSION', '2025-03-01-preview')}
+        # VOICE_PROVIDERS lists the backends to use, in order of initial preference; any without
+        # credentials are skipped. Measured latency and errors re-rank them at runtime.
+        ranked = []
+        for key in os.getenv('VOICE_PROVIDERS', 'azure,openai').split(','):
+            key = key.strip().lower()
+            backend_class = TRANSCRIPTION_BACKENDS.get(key)
+            if backend_class is None:
+                logger.warning(f"Unknown transcription backend '{key}' in VOICE_PROVIDERS, ignoring")
+                continue
+            backend = backend_class.from_env(self.http_client)
+            if backend is not None:
+                ranked.append(backend)
+        if not ranked:
+            # Nothing configured: the OpenAI client reports the missing API key
+            ranked.append(OpenAIBackend.create(self.http_client))
+        self.providers = ProviderPool(
+            ranked,
+            hedge=env_flag('VOICE_HEDGE', True),
+            hedge_percentile=float(os.getenv('VOICE_HEDGE_PERCENTILE', '95')),
+            hedge_min_delay=float(os.getenv('VOICE_HEDGE_MIN_DELAY', '1.0')),
+            hedge_default_delay=float(os.getenv('VOICE_HEDGE_DEFAULT_DELAY', '4.0')),
+            retries=int(os.getenv('VOICE_PROVIDER_RETRIES', '1'))
+        )
+        primary = ranked[0]
+        self.api_provider = primary.name
+        self.cost_per_minute = primary.cost_per_minute
+        if len(ranked) > 1:
+            logger.info(f"🔀 {len(ranked)} providers configured ({', '.join(p.name for p in ranked)}); "
+                        f"failover {'and hedging ' if self.providers.hedge else ''}enabled")
+        
+        # Route short, clean clips to a cheaper "mini" model tier where a backend offers one
+        self.router = None
+        if env_flag('VOICE_MODEL_ROUTING', False) and any('mini' in backend.tiers for backend in ranked):
+            self.router = ModelRouter(
+                short_seconds=float(os.getenv('VOICE_ROUTE_SHORT_SECONDS', '30')),
+                min_snr_db=float(os.getenv('VOICE_ROUTE_MIN_SNR_DB', '15')),
+                max_mini_latency=float(os.getenv('VOICE_ROUTE_MAX_MINI_LATENCY', '4'))
             )
-            # Set pricing based on deployment model
-            if 'gpt-4o-mini-transcribe' in deployment_name:
-                self.cost_per_minute = 0.003  # GPT-4o-mini-transcribe: $0.003/min
-                logger.info("Using GPT-4o-mini-transcribe pricing: $0.003/minute")
-            elif 'gpt-4o-transcribe' in deployment_name:
-                self.cost_per_minute = 0.006  # GPT-4o-transcribe: $0.006/min
-                logger.info("Using GPT-4o-transcribe pricing: $0.006/minute")
-            else:
-                self.cost_per_minute = 0.006  # Default to standard rate
-                logger.info("Using default transcription pricing: $0.006/minute")
-        else:
-            logger.info("✅ Using regular OpenAI API")
-            self.api_provider = "OpenAI"
-            self.client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-            # OpenAI Whisper pricing: $0.006 per minute
-            self.cost_per_minute = 0.006
             
         self.is_recording = False
-        self.audio_frames = []
-        self.recording_thread = None
+        self.audio_frames = PCMBuffer()
         self.recording_start_time = None
+        # Per-stage latency of every recording; the current capture's stages until stop hands them to its job
+        self.stage_metrics = StageMetrics()
+        self._capture_trace = None
+        self._recording_id = None
+        self.counters = Counters()
+        self._audio = None
+        self._stream = None
+        self.dropped_chunks = 0
+        self._capture_requested_at = None
+        self.first_sample_latency = None
+        self._capture_lock = threading.Lock()
+        self._callback_seconds = 0.0
+        self._callback_window_start = time.perf_counter()
+        self.preroll = None
+        self.preroll_seconds_used = 0.0
         
         # Audio settings
         self.CHUNK = 1024
         self.FORMAT = pyaudio.paInt16
         self.CHANNELS = 1
         self.RATE = 44100
+        # Whisper works at 16 kHz, so anything above that only inflates the upload (0 keeps the capture rate)
+        self.upload_rate = int(os.getenv('VOICE_UPLOAD_RATE', '16000'))
+        if self.upload_rate and env_flag('VOICE_NATIVE_CAPTURE', True) and self._input_supports_rate(self.upload_rate):
+            logger.info(f"Input device supports {self.upload_rate}Hz, capturing natively")
+            self.RATE = self.upload_rate
+        # Seconds of audio to preallocate per recording (buffer doubles beyond this)
+        self.prealloc_seconds = float(os.getenv('VOICE_PREALLOC_SECONDS', '60'))
+        # Warm mic: keep one PyAudio instance and a stopped input stream open between recordings
+        self.warm_mic = env_flag('VOICE_WARM_MIC', False)
+        # Pre-roll: milliseconds of audio before the hotkey to prepend (0 disables; implies a warm, running stream)
+        self.preroll_ms = int(os.getenv('VOICE_PREROLL_MS', '0'))
+        # Stream to disk: encode the WAV while recording instead of buffering everything until stop
+        self.stream_to_disk = env_flag('VOICE_STREAM_TO_DISK', False)
+        self.disk_flush_interval = float(os.getenv('VOICE_DISK_FLUSH_INTERVAL', '0.25'))
+        self._wav_writer = None
+        self._drain_thread = None
+        self._drain_stop = threading.Event()
+        # Build uploads in memory; recordings whose WAV would exceed the threshold spill to a temp file
+        self.in_memory_upload = env_flag('VOICE_IN_MEMORY_UPLOAD', True)
+        self.spill_threshold_bytes = int(float(os.getenv('VOICE_SPILL_THRESHOLD_MB', '20')) * 1024 * 1024)
+        # Upload encoder: wav (default), flac or opus; falls back to WAV when no local encoder is available
+        upload_format = os.getenv('VOICE_UPLOAD_FORMAT', 'wav').lower()
+        encoder_class = UPLOAD_ENCODERS.get(upload_format)
+        if encoder_class is None:
+            logger.warning(f"Unknown VOICE_UPLOAD_FORMAT '{upload_format}', uploading WAV")
+            encoder_class = AudioEncoder
+        self.encoder = encoder_class()
+        if not self.encoder.available():
+            logger.warning(f"No local {self.encoder.name} encoder found (install soundfile or ffmpeg), uploading WAV")
+            self.encoder = AudioEncoder()
+        logger.info(f"Upload format: {self.encoder.name}")
+        # Voice activity detection: trim silence before upload (memory captures only)
+        self.vad = None
+        if env_flag('VOICE_VAD', True):
+            self.vad = VoiceActivityDetector(
+                margin_db=float(os.getenv('VOICE_VAD_MARGIN_DB', '12')),
+                pad_ms=int(os.getenv('VOICE_VAD_PAD_MS', '250')),
+                max_pause_ms=int(os.getenv('VOICE_VAD_MAX_PAUSE_MS', '0'))
+            )
+        # Streaming: transcribe pause-delimited segments while still recording (memory captures only)
+        self.streaming = env_flag('VOICE_STREAMING', False)
+        if self.streaming and self.stream_to_disk:
+            logger.warning("VOICE_STREAMING needs in-memory capture, disabling it because VOICE_STREAM_TO_DISK is on")
+            self.streaming = False
+        self._segmenter = None
+        self.segment_executor = None
+        if self.streaming:
+            self.segment_executor = ThreadPoolExecutor(
+                max_workers=int(os.getenv('VOICE_STREAMING_WORKERS', '3')),
+                thread_name_prefix="segment"
+            )
+            logger.info("🌊 Streaming transcription enabled: segments are sent at pauses while recording")
+        # Long recordings are split into overlapping windows transcribed in parallel
+        self.chunk_seconds = float(os.getenv('VOICE_CHUNK_SECONDS', '60'))
+        self.chunk_overlap_seconds = float(os.getenv('VOICE_CHUNK_OVERLAP_SECONDS', '2'))
+        if self.chunk_seconds <= 0 or not 0 <= self.chunk_overlap_seconds < self.chunk_seconds:
+            raise ValueError(f"VOICE_CHUNK_OVERLAP_SECONDS ({self.chunk_overlap_seconds:g}) must be at least 0 and "
+                             f"less than VOICE_CHUNK_SECONDS ({self.chunk_seconds:g})")
+        # Words the audio overlap can hold; a longer search window lets repeated phrases delete real words
+        self.chunk_overlap_words = (math.ceil(self.chunk_overlap_seconds * SPOKEN_WORDS_PER_SECOND) + 2
+                                    if self.chunk_overlap_seconds else 0)
+        self.chunk_executor = None
+        if env_flag('VOICE_CHUNKING', True):
+            self.chunk_executor = ThreadPoolExecutor(
+                max_workers=int(os.getenv('VOICE_CHUNK_WORKERS', '4')),
+                thread_name_prefix="chunk"
+            )
+        # Finished recordings are transcribed on worker threads so the hotkey listener never blocks
+        self.pipeline = TranscriptionPipeline(
+            self.process_recording,
+            self.deliver_transcription,
+            workers=int(os.getenv('VOICE_TRANSCRIBE_WORKERS', '2'))
+        )
+        # Identical audio (replays, retries, benchmarks) is answered from disk instead of the API
+        self.cache = None
+        if env_flag('VOICE_CACHE', True):
+            self.cache = TranscriptionCache(
+                os.path.expanduser(os.getenv('VOICE_CACHE_DIR', os.path.join('~', '.voice-recorder', 'cache'))),
+                max_bytes=int(float(os.getenv('VOICE_CACHE_MAX_MB', '50')) * 1024 * 1024)
+            )
+            logger.info(f"🗃️  Transcription cache: {len(self.cache)} entries in {self.cache.directory}")
+        # Failed uploads are kept on disk and retried in the background instead of being lost
+        self.spool = None
+        if env_flag('VOICE_SPOOL', True):
+            self.spool = TranscriptionSpool(
+                os.path.expanduser(os.getenv('VOICE_SPOOL_DIR', os.path.join('~', '.voice-recorder', 'spool'))),
+                self._retry_spooled,
+                self._deliver_spooled,
+                max_bytes=int(float(os.getenv('VOICE_SPOOL_MAX_MB', '200')) * 1024 * 1024),
+                max_age_seconds=float(os.getenv('VOICE_SPOOL_MAX_AGE_HOURS', '72')) * 3600,
+                base_delay=float(os.getenv('VOICE_RETRY_BASE_DELAY', '15')),
+                max_delay=float(os.getenv('VOICE_RETRY_MAX_DELAY', '900'))
+            )
+            self.spool.start()
+        # Optional Prometheus endpoint; off unless a port is configured
+        self.metrics_server = None
+        metrics_port = int(os.getenv('VOICE_METRICS_PORT', '0'))
+        if metrics_port:
+            try:
+                self.metrics_server = MetricsServer(self, os.getenv('VOICE_METRICS_HOST', '127.0.0.1'), metrics_port)
+                self.metrics_server.start()
+                logger.info(f"📈 Metrics at {self.metrics_server.url}")
+            except OSError as e:
+                logger.warning(f"Metrics endpoint unavailable on port {metrics_port}: {e}")
         
         # Track pressed keys for hotkey detection
         self.pressed_keys = set()
         
         logger.info(f"Audio settings: {self.CHANNELS} channel(s), {self.RATE}Hz, chunk size {self.CHUNK}")
+        if self.upload_rate and self.upload_rate != self.RATE:
+            logger.info(f"Uploads will be resampled {self.RATE}Hz → {self.upload_rate}Hz")
+        if self.preroll_ms > 0:
+            frame_bytes = self.frame_bytes
+            self.preroll = RingBuffer(int(self.RATE * self.preroll_ms / 1000) * frame_bytes)
+            try:
+                self._open_input_stream(start=True)
+                logger.info(f"⏪ Pre-roll enabled: keeping the last {self.preroll_ms} ms "
+                            f"({self.preroll.capacity / 1024:.1f} KB ring buffer)")
+            except Exception as e:
+                logger.warning(f"Pre-roll unavailable, recordings will start at the hotkey: {e}")
+                self.preroll = None
+                self._close_stream()
+        elif self.warm_mic:
+            try:
+                self._open_input_stream(start=False)
+                logger.info("🔥 Warm mic enabled: input stream primed and paused")
+            except Exception as e:
+                logger.warning(f"Warm mic unavailable, opening the stream per recording instead: {e}")
+                self._close_stream()
         logger.info(f"Cost tracking: ${self.cost_per_minute}/minute via {self.api_provider}")
         logger.info("VoiceRecorder initialized successfully")
         
@@ -174,6 +2562,11 @@ class VoiceRecorder:
             self._play_tone(1000, 90)
             time.sleep(0.03)
             self._play_tone(1450, 110)
+        elif 'cancel' in key:
+            # Two quick falling tones
+            self._play_tone(700, 80)
+            time.sleep(0.03)
+            self._play_tone(450, 110)
         elif 'error' in key or 'failed' in key:
             # Three brief low beeps
             for f in (320, 280, 240):
@@ -203,198 +2596,897 @@ class VoiceRecorder:
         except Exception as e:
             logger.debug(f"Audio cue failed: {e}")
         
+    def _input_supports_rate(self, rate: int) -> bool:
+        """Check whether the default input device can capture at ``rate`` directly"""
+        audio = pyaudio.PyAudio()
+        try:
+            device = audio.get_default_input_device_info()
+            return audio.is_format_supported(
+                rate,
+                input_device=device['index'],
+                input_channels=self.CHANNELS,
+                input_format=self.FORMAT
+            )
+        except Exception:
+            return False
+        finally:
+            audio.terminate()
+
+    @property
+    def frame_bytes(self) -> int:
+        return pyaudio.get_sample_size(self.FORMAT) * self.CHANNELS
+
+    def _new_capture_buffer(self, seconds: Optional[float] = None) -> PCMBuffer:
+        return PCMBuffer(int((seconds or self.prealloc_seconds) * self.RATE) * self.frame_bytes)
+
+    def _staging_seconds(self) -> float:
+        # Room for a few flush intervals plus the largest pre-roll, so staging rarely grows
+        return self.disk_flush_interval * 4 + self.preroll_ms / 1000
+
+    def _drain_to_disk(self, writer: StreamingWavWriter):
+        """Double-buffer captured audio from the callback into the streaming WAV writer"""
+        spare = self._new_capture_buffer(self._staging_seconds())
+        while True:
+            stopping = self._drain_stop.wait(self.disk_flush_interval)
+            with self._capture_lock:
+                full, self.audio_frames = self.audio_frames, spare
+            if full:
+                writer.write(full.getbuffer())
+            full.clear()
+            spare = full
+            if stopping:
+                break
+
+    def _on_audio(self, in_data, frame_count, time_info, status_flags):
+        """PortAudio stream callback: copy captured PCM into the recording or pre-roll buffer"""
+        started = time.perf_counter()
+        if status_flags & pyaudio.paInputOverflow:
+            self.dropped_chunks += 1
+        with self._capture_lock:
+            if self.is_recording:
+                if self.first_sample_latency is None:
+                    self.first_sample_latency = started - self._capture_requested_at
+                self.audio_frames.write(in_data)
+            elif self.preroll is not None:
+                self.preroll.write(in_data)
+        self._callback_seconds += time.perf_counter() - started
+        return (None, pyaudio.paContinue)
+
+    def _log_capture_overhead(self):
+        """Report the callback's share of one CPU since the last recording started"""
+        now = time.perf_counter()
+        elapsed = now - self._callback_window_start
+        if self.preroll is not None and elapsed > 0:
+            logger.info(f"Capture callback overhead: {self._callback_seconds * 1000:.1f} ms of callback time over "
+                        f"{elapsed:.1f}s ({self._callback_seconds / elapsed * 100:.3f}% CPU), "
+                        f"{self.preroll.capacity / 1024:.1f} KB buffer")
+        self._callback_seconds = 0.0
+        self._callback_window_start = now
+
+    def _open_input_stream(self, start: bool = True):
+        """Create the PyAudio instance and the callback-driven input stream"""
+        logger.info("Initializing PyAudio...")
+        self._audio = pyaudio.PyAudio()
+        
+        logger.info("Opening audio stream...")
+        self._stream = self._audio.open(
+            format=self.FORMAT,
+            channels=self.CHANNELS,
+            rate=self.RATE,
+            input=True,
+            frames_per_buffer=self.CHUNK,
+            stream_callback=self._on_audio,
+            start=start
+        )
+
+    def _new_wav_writer(self, target, src_rate: Optional[int] = None) -> StreamingWavWriter:
+        """WAV writer at the upload rate, resampling from the capture rate if they differ"""
+        src_rate = src_rate or self.RATE
+        return StreamingWavWriter(
+            target,
+            channels=self.CHANNELS,
+            sample_width=pyaudio.get_sample_size(self.FORMAT),
+            rate=self.upload_rate or src_rate,
+            src_rate=src_rate
+        )
+
+    def _close_stream(self):
+        """Stop and release the input stream and its PyAudio instance"""
+        try:
+            if self._stream is not None:
+                self._stream.stop_stream()
+                self._stream.close()
+            if self._audio is not None:
+                self._audio.terminate()
+        except Exception as e:
+            logger.debug(f"Error closing audio stream: {e}")
+        finally:
+            self._stream = None
+            self._audio = None
+
     def start_recording(self):
-        """Start audio recording in a separate thread"""
+        """Start audio recording via a PortAudio callback stream"""
         if self.is_recording:
             logger.warning("Already recording, ignoring start request")
             return
             
         self.recording_start_time = time.time()
         logger.info(f"🎙️  Starting recording at {datetime.now().strftime('%H:%M:%S')}")
-        # Play start cue before grabbing the microphone
-        self.audio_cue('start')
-        self.is_recording = True
-        self.audio_frames = []
+        trace = self._capture_trace = LatencyTrace()
+        trace.begin('hotkey_to_capture')
+        self._recording_id = os.urandom(6).hex()
+        warm = self._stream is not None
+        preroll_audio = b''
+        if self.preroll is not None:
+            # Take the pre-roll before the cue plays: the ring only holds VOICE_PREROLL_MS
+            with self._capture_lock:
+                preroll_audio = self.preroll.snapshot()
+                self.preroll.clear()
+        # Play the start cue before capture begins so the beep never lands in the recording
+        with trace.span('start_cue'):
+            self.audio_cue('start')
+        if self.preroll is not None:
+            # The running stream heard the cue; drop it
+            with self._capture_lock:
+                self.preroll.clear()
+        self._log_capture_overhead()
+        setup_start = time.perf_counter()
+        if self.stream_to_disk:
+            with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp_file:
+                self._wav_writer = self._new_wav_writer(tmp_file.name)
+            buffer = self._new_capture_buffer(self._staging_seconds())
+        else:
+            buffer = self._new_capture_buffer()
+        trace.add('capture_setup', time.perf_counter() - setup_start)
+        with self._capture_lock:
+            # Swap buffers under the callback's lock so no chunk falls between pre-roll and recording
+            self.preroll_seconds_used = 0.0
+            if self.preroll is not None:
+                # Audio before the hotkey, then whatever arrived between the cue and this swap
+                preroll_audio += self.preroll.snapshot()
+                buffer.write(preroll_audio)
+                self.preroll.clear()
+                self.preroll_seconds_used = len(preroll_audio) / self.frame_bytes / self.RATE
+            self.audio_frames = buffer
+            self.dropped_chunks = 0
+            self.first_sample_latency = None
+            self._capture_requested_at = time.perf_counter()
+            self.is_recording = True
+        if self.preroll_seconds_used:
+            logger.info(f"⏪ Prepended {self.preroll_seconds_used * 1000:.0f} ms of pre-roll audio")
         
-        def record():
-            try:
-                logger.info("Initializing PyAudio...")
-                audio = pyaudio.PyAudio()
-                
-                logger.info("Opening audio stream...")
-                stream = audio.open(
-                    format=self.FORMAT,
-                    channels=self.CHANNELS,
-                    rate=self.RATE,
-                    input=True,
-                    frames_per_buffer=self.CHUNK
-                )
-                logger.info("Recording audio data...")
-                frame_count = 0
-                while self.is_recording:
-                    data = stream.read(self.CHUNK)
-                    self.audio_frames.append(data)
-                    frame_count += 1
-                    if frame_count % 100 == 0:  # Log every 100 chunks (~2.3 seconds)
-                        logger.info(f"Recorded {frame_count} audio chunks ({len(self.audio_frames)} total)")
-                
-                logger.info(f"Recording finished. Total chunks: {len(self.audio_frames)}")
-                stream.stop_stream()
-                stream.close()
-                audio.terminate()
-                logger.info("Audio stream closed")
-            except Exception as e:
-                logger.error(f"Error during recording: {e}")
-                self.is_recording = False
-                self.audio_cue('error')
+        try:
+            with trace.span('stream_open'):
+                if warm:
+                    if not self._stream.is_active():
+                        self._stream.start_stream()
+                else:
+                    self._open_input_stream()
+            trace.end()
+            logger.info(f"Recording audio data (callback mode, {'warm' if warm else 'cold'} mic)...")
+        except Exception as e:
+            logger.error(f"Error during recording: {e}")
+            self.is_recording = False
+            self._close_stream()
+            if self._wav_writer is not None:
+                self._wav_writer.close()
+                os.unlink(self._wav_writer.path)
+                self._wav_writer = None
+            self.audio_cue('error')
+            return
         
-        self.recording_thread = threading.Thread(target=record)
-        self.recording_thread.start()
-        logger.info("Recording thread started")
+        if self.streaming:
+            self._segmenter = LiveSegmenter(
+                buffer,
+                rate=self.RATE,
+                frame_bytes=self.frame_bytes,
+                vad=self.vad or VoiceActivityDetector(),
+                submit=self._submit_segment,
+                min_segment_seconds=float(os.getenv('VOICE_STREAMING_MIN_SEGMENT_SECONDS', '8')),
+                max_segment_seconds=float(os.getenv('VOICE_STREAMING_MAX_SEGMENT_SECONDS', '30')),
+                min_pause_ms=int(os.getenv('VOICE_STREAMING_PAUSE_MS', '400'))
+            )
+            self._segmenter.start()
+        
+        if self._wav_writer is not None:
+            self._drain_stop.clear()
+            self._drain_thread = threading.Thread(target=self._drain_to_disk, args=(self._wav_writer,), daemon=True)
+            self._drain_thread.start()
+            logger.info(f"Streaming audio to {self._wav_writer.path}")
+        
+        # An upload always follows a recording, so open the API connection now
+        self.warm_connection()
     
+    def warm_connection(self):
+        """Open (or refresh) a pooled connection to the API endpoint in the background"""
+        if not self.prewarm_connection:
+            return
+        if time.monotonic() - self._last_http_activity < self.keepalive_seconds / 2:
+            return  # A recent request left a live connection in the pool
+        for provider in self.providers.providers:
+            if provider.base_url is None:
+                continue
+            threading.Thread(target=self._warm_connection, args=(provider,), name="connection-warmup", daemon=True).start()
+
+    def _warm_connection(self, provider: TranscriptionBackend):
+        started = time.perf_counter()
+        try:
+            # Any response will do: the point is the TCP/TLS handshake, which the pool then keeps
+            self.http_client.head(provider.base_url, timeout=5.0)
+            self._last_http_activity = time.monotonic()
+            info = self.connection_tracer.last()
+            if info.get('connection_reused'):
+                detail = "reused pooled connection"
+            else:
+                detail = f"TCP {info.get('tcp_connect_ms')} ms, TLS {info.get('tls_handshake_ms')} ms"
+            logger.info(f"🔌 {provider.name} connection warmed in {(time.perf_counter() - started) * 1000:.1f} ms ({detail})")
+        except Exception as e:
+            logger.debug(f"Connection warm-up failed: {e}")
+
     def stop_recording(self):
-        """Stop recording and process audio"""
+        """Stop recording and hand the audio to the transcription pipeline"""
         if not self.is_recording:
             logger.warning("Not recording, ignoring stop request")
             return
             
+        hotkey_at = time.perf_counter()
         logger.info("⏹️  Stopping recording...")
-        self.is_recording = False
+        with self._capture_lock:
+            self.is_recording = False
+        stopped_at = time.time()
+        trace = self._capture_trace or LatencyTrace()
+        self._capture_trace = None
+        if self.first_sample_latency is not None:
+            # Measured from the start hotkey, so it sits outside the hotkey-to-paste breakdown
+            trace.add('first_sample', self.first_sample_latency)
+        trace.begin('hotkey_to_paste', hotkey_at)
         # Immediate stop cue
-        self.audio_cue('stop')
+        with trace.span('stop_cue'):
+            self.audio_cue('stop')
         
-        if self.recording_thread:
-            logger.info("Waiting for recording thread to finish...")
-            self.recording_thread.join()
-            logger.info("Recording thread finished")
+        with trace.span('stream_stop'):
+            if self.preroll is not None and self._stream is not None:
+                # Keep the stream running so the pre-roll buffer stays current
+                pass
+            elif self.warm_mic and self._stream is not None:
+                # Pause rather than close so the next recording starts instantly
+                self._stream.stop_stream()
+            else:
+                self._close_stream()
+        if self.first_sample_latency is not None:
+            logger.info(f"⚡ Start-to-first-sample latency: {self.first_sample_latency * 1000:.1f} ms "
+                        f"({'warm' if self.warm_mic or self.preroll is not None else 'cold'} mic)")
+        writer = self._wav_writer
+        self._wav_writer = None
+        if writer is not None:
+            # Final drain; only the last flush interval is still in memory
+            with trace.span('drain_join'):
+                self._drain_stop.set()
+                self._drain_thread.join()
+        tail_offset, segments = 0, []
+        if self._segmenter is not None:
+            with trace.span('segmenter_finish'):
+                tail_offset, segments = self._segmenter.finish()
+            self._segmenter = None
+        job = RecordingJob(
+            started_at=self.recording_start_time,
+            stopped_at=stopped_at,
+            rate=self.RATE,
+            frame_bytes=self.frame_bytes,
+            pcm=self.audio_frames.getbuffer()[tail_offset:] if writer is None else None,
+            writer=writer,
+            first_sample_latency=self.first_sample_latency,
+            preroll_seconds=self.preroll_seconds_used,
+            dropped_chunks=self.dropped_chunks
+        )
+        job.segments = segments
+        if segments:
+            job.recording_pcm = self.audio_frames.getbuffer()
+        job.cancel = self._cancel_event
+        job.recording_id = self._recording_id
+        job.trace = trace
+        captured_bytes = job.captured_bytes + tail_offset
+        logger.info(f"Recording finished. Captured {captured_bytes:,} bytes "
+                    f"({captured_bytes / self.frame_bytes / self.RATE:.2f}s)")
+        if segments:
+            logger.info(f"{len(segments)} live segment(s) already submitted; {job.captured_seconds:.2f}s tail remains")
+        if self.dropped_chunks:
+            logger.warning(f"Input overflowed {self.dropped_chunks} time(s); some audio was dropped")
+        logger.info("Audio stream closed")
         
-        if not self.audio_frames:
+        if not captured_bytes:
             logger.warning("No audio data recorded")
+            if writer is not None:
+                writer.close()
+                os.unlink(writer.path)
             self.audio_cue('error')
             return
+        
+        self.pipeline.submit(job)
+        self.counters.inc('recordings')
+        self.counters.inc('dropped_chunks', self.dropped_chunks)
+        logger.info(f"Recording #{job.seq} queued for transcription ({self.pipeline.depth} in flight)")
+    
+    def _submit_segment(self, pcm, index: int, offset: int):
+        """Queue a live segment of the current recording for transcription"""
+        started_at = self.recording_start_time + offset / self.frame_bytes / self.RATE
+        job = RecordingJob(
+            started_at=started_at,
+            stopped_at=started_at + len(pcm) / self.frame_bytes / self.RATE,
+            rate=self.RATE,
+            frame_bytes=self.frame_bytes,
+            pcm=pcm,
+            segment_index=index
+        )
+        job.cancel = self._cancel_event
+        job.recording_id = self._recording_id
+        return self.segment_executor.submit(self.transcribe_recording, job)
+    
+    def process_recording(self, job: 'RecordingJob') -> Optional[str]:
+        """Transcribe a finished recording and stitch in any live segments (runs on a pipeline worker)"""
+        if job.cancel is not None and job.cancel.is_set():
+            # Cancelled while still queued: never upload it
+            if job.writer is not None:
+                job.writer.close()
+                os.unlink(job.writer.path)
+            return None
+        job.trace.add('queue_wait', job.queue_wait)
+        if not job.segments:
+            with job.trace.span('transcribe'):
+                return self.transcribe_recording(job)
+        errors = []
+        tail = None
+        with job.trace.span('transcribe'):
+            try:
+                tail = self.transcribe_recording(job)
+            except Exception as e:
+                errors.append(f"tail: {e}")
+        parts = []
+        for index, future in enumerate(job.segments):
+            text = None
+            try:
+                with job.trace.span('segment_wait'):
+                    text = future.result()
+            except Exception as e:
+                logger.error(f"Live segment {index + 1} failed: {e}")
+                errors.append(f"segment {index + 1}: {e}")
+            else:
+                if not text:
+                    logger.warning(f"Live segment {index + 1} produced no text")
+            parts.append(text)
+        if errors:
+            # Pasting the segments that worked would leave a silent gap; the recording is retried whole
+            logger.error(f"❌ {len(errors)} part(s) of recording #{job.seq} failed")
+            job.audio = AudioMetadata(job.rate, job.frame_bytes, len(job.recording_pcm) // job.frame_bytes)
+            self._spool_recording(job, self._wav_payload(job.recording_pcm, job.rate), "; ".join(errors))
+            return None
+        parts.append(tail)
+        stitched = " ".join(part.strip() for part in parts if part)
+        logger.info(f"🧵 Stitched {len(job.segments)} live segment(s) and the final tail")
+        return stitched or None
+    
+    def transcribe_recording(self, job: 'RecordingJob') -> Optional[str]:
+        """Trim, encode and transcribe the audio held by a job"""
+        writer = job.writer
+        pcm = None
+        if writer is None:
+            pcm = job.pcm
+            if self.router is not None:
+                # Measure noise before trimming, while the clip still has its quiet edges
+                with job.trace.span('snr'):
+                    job.snr_db = (self.vad or VoiceActivityDetector()).snr_db(pcm, job.rate)
+            if self.vad is not None:
+                vad_start = time.perf_counter()
+                with job.trace.span('vad'):
+                    trimmed = self.vad.trim(pcm, job.rate)
+                if trimmed is None:
+                    logger.warning(f"🔇 Recording {job.label}: no speech detected, skipping transcription")
+                    return None
+                job.audio.set_uploaded(len(trimmed))
+                saved = job.audio.removed_seconds / 60 * self.cost_per_minute
+                logger.info(f"✂️  VAD removed {job.audio.removed_seconds:.2f}s of silence in "
+                            f"{(time.perf_counter() - vad_start) * 1000:.1f} ms (saves ${saved:.4f})")
+                pcm = trimmed
+        
+        if self.chunk_executor is not None:
+            audio_bytes = len(pcm) if writer is None else writer.input_bytes
+            if audio_bytes / job.frame_bytes / job.rate > self.chunk_seconds * 1.5:
+                return self._transcribe_chunked(job, pcm)
+        return self._encode_and_transcribe(job, pcm)
+    
+    def _transcribe_chunked(self, job: 'RecordingJob', pcm=None, retrying: bool = False) -> Optional[str]:
+        """Split a long recording into overlapping windows, transcribe them concurrently and merge.
+
+        If any chunk fails nothing is returned: the recording is spooled whole
+        (or, for a spool retry or a streaming tail, the failure is raised).
+        """
+        spill_path = None
+        if pcm is None:
+            # Streamed-to-disk recording: windows are read back from the finished WAV at the upload rate
+            job.writer.close()
+            spill_path, rate = job.writer.path, job.writer.rate
+            total = job.writer.data_bytes
             
-        # Save audio to temporary file
-        logger.info("Creating temporary audio file...")
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp_file:
-            audio_file = tmp_file.name
+            def read_window(start, end):
+                with open(spill_path, 'rb') as f:
+                    f.seek(StreamingWavWriter.HEADER.size + start)
+                    return f.read(end - start)
+        else:
+            rate, total = job.rate, len(pcm)
             
-        logger.info(f"Writing audio data to {audio_file}...")
-        # Write audio data to file
+            def read_window(start, end):
+                return pcm[start:end]
+        
+        window = int(self.chunk_seconds * rate) * job.frame_bytes
+        overlap = int(self.chunk_overlap_seconds * rate) * job.frame_bytes
+        offsets = list(range(0, max(total - overlap, 1), window - overlap))
+        logger.info(f"🧩 Splitting {total / job.frame_bytes / rate:.1f}s into {len(offsets)} overlapping "
+                    f"{self.chunk_seconds:.0f}s chunks")
+        
+        def transcribe_window(index, start):
+            end = min(total, start + window)
+            chunk_start = job.started_at + start / job.frame_bytes / rate
+            chunk = RecordingJob(
+                started_at=chunk_start,
+                stopped_at=chunk_start + (end - start) / job.frame_bytes / rate,
+                rate=rate,
+                frame_bytes=job.frame_bytes,
+                pcm=read_window(start, end),
+                chunk_index=index
+            )
+            chunk.cancel = job.cancel
+            chunk.recording_id = job.recording_id
+            return self._encode_and_transcribe(chunk, chunk.pcm)
+        
+        chunk_start = time.perf_counter()
+        errors = []
         try:
-            with wave.open(audio_file, 'wb') as wf:
-                wf.setnchannels(self.CHANNELS)
-                wf.setsampwidth(pyaudio.PyAudio().get_sample_size(self.FORMAT))
-                wf.setframerate(self.RATE)
-                wf.writeframes(b''.join(self.audio_frames))
-            
-            logger.info(f"Audio file created successfully. Size: {os.path.getsize(audio_file)} bytes")
+            futures = [self.chunk_executor.submit(transcribe_window, i, start) for i, start in enumerate(offsets)]
+            texts = []
+            for index, future in enumerate(futures):
+                try:
+                    texts.append(future.result())
+                except Exception as e:
+                    logger.error(f"Chunk {index + 1} failed: {e}")
+                    errors.append(f"chunk {index + 1}: {e}")
+                    texts.append(None)
+            if errors:
+                error = f"{len(errors)} of {len(futures)} chunks failed ({'; '.join(errors)})"
+                if retrying or not job.is_whole_recording:
+                    raise RuntimeError(error)
+                if spill_path:
+                    audio = AudioPayload('recording.wav', path=spill_path, pcm_digest=job.writer.digest.hexdigest())
+                else:
+                    audio = self._wav_payload(pcm, rate)
+                self._spool_recording(job, audio, error)
+                return None
+        finally:
+            if spill_path and os.path.exists(spill_path):
+                os.unlink(spill_path)
+        merged = merge_overlapping_transcripts([text for text in texts if text],
+                                               max_overlap_words=self.chunk_overlap_words)
+        logger.info(f"🧩 Merged {len(texts)} chunks in {time.perf_counter() - chunk_start:.2f}s wall clock")
+        return merged or None
+    
+    def _encode_and_transcribe(self, job: 'RecordingJob', pcm=None) -> Optional[str]:
+        """Encode PCM (or finalize the job's streamed WAV) and send it to the API"""
+        writer = job.writer if pcm is None else None
+        if job.audio.uploaded_frames is None:
+            job.audio.set_uploaded(len(pcm) if pcm is not None else writer.input_bytes)
+        if self.router is not None and pcm is not None and job.snr_db is None:
+            with job.trace.span('snr'):
+                job.snr_db = (self.vad or VoiceActivityDetector()).snr_db(pcm, job.rate)
+        write_start = time.perf_counter()
+        try:
+            if writer is None:
+                upload_estimate = len(pcm) * (self.upload_rate or job.rate) / job.rate
+                if self.in_memory_upload and upload_estimate <= self.spill_threshold_bytes:
+                    logger.info("Encoding audio in memory...")
+                    writer = self._new_wav_writer(io.BytesIO(), job.rate)
+                else:
+                    # Save audio to temporary file
+                    logger.info("Creating temporary audio file...")
+                    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp_file:
+                        writer = self._new_wav_writer(tmp_file.name, job.rate)
+                    logger.info(f"Writing audio data to {writer.path}...")
+                writer.write(pcm)
+            writer.close()
+            audio = AudioPayload.from_writer(writer, time.perf_counter() - write_start)
+            job.trace.add('wav_write', audio.encode_seconds)
+            logger.info(f"Audio {'encoded in memory' if audio.storage == 'memory' else 'file finalized'} in "
+                        f"{audio.encode_seconds * 1000:.1f} ms. Size: {audio.size} bytes")
         except Exception as e:
             logger.error(f"Error writing audio file: {e}")
-            self.audio_cue('error')
-            return
+            return None
+        
+        if self.encoder.name != audio.format:
+            try:
+                with job.trace.span('encode'):
+                    encoded = self.encoder.encode(audio)
+                audio.cleanup()
+                audio = encoded
+                logger.info(f"Encoded {audio.format} in {audio.encode_seconds * 1000:.1f} ms total: "
+                            f"{audio.size:,} bytes ({audio.compression_ratio:.1f}x smaller than WAV)")
+            except Exception as e:
+                logger.warning(f"{self.encoder.name} encoding failed, uploading WAV instead: {e}")
         
         # Transcribe audio
         logger.info("Starting transcription...")
-        transcription = self.transcribe_audio(audio_file)
-        
-        # Clean up temporary file
-        logger.info("Cleaning up temporary file...")
-        os.unlink(audio_file)
-        
-        if transcription:
-            logger.info(f"📝 Transcribed: {transcription}")
-            self.paste_text(transcription)
+        try:
+            return self.transcribe_audio(audio, job)
+        finally:
+            if audio.path:
+                # Clean up temporary file
+                logger.info("Cleaning up temporary file...")
+            audio.cleanup()
+    
+    def deliver_transcription(self, job: 'RecordingJob', transcription: Optional[str]):
+        """Paste a finished transcription; the pipeline calls this in recording order"""
+        if job.cancel is not None and job.cancel.is_set():
+            logger.info(f"🛑 Discarded cancelled recording #{job.seq}")
+        elif transcription:
+            logger.info(f"📝 Transcribed #{job.seq}: {transcription}")
+            self.paste_text(transcription, job.trace)
+            job.trace.end()
             logger.info("✅ Copied to clipboard and pasted!")
             self.audio_cue('success')
+            self._log_stages(job)
+        elif job.spooled:
+            logger.warning(f"❌ Recording #{job.seq} failed; it is saved in the spool and will be delivered once a retry succeeds")
+            self.audio_cue('error')
         else:
-            logger.warning("❌ No transcription received")
+            logger.warning(f"❌ No transcription received for recording #{job.seq}")
             self.audio_cue('error')
+        job.trace.end()
+        # Success records were held back so their stage timings include the paste
+        for record in job.usage_records:
+            record['stage_ms'] = job.trace.as_ms()
+            self.usage_log.write(record)
     
-    def transcribe_audio(self, audio_file: str) -> Optional[str]:
-        """Transcribe audio using OpenAI Whisper"""
-        file_size = os.path.getsize(audio_file)
+    def _log_stages(self, job: 'RecordingJob'):
+        """Add a delivered recording's stage timings to the histograms and log where its latency went"""
+        self.stage_metrics.record(job.trace)
+        tree = job.trace.as_ms()
         
-        # Calculate recording duration and estimated cost
-        recording_duration = time.time() - self.recording_start_time if self.recording_start_time else 0
-        audio_duration_minutes = recording_duration / 60
+        def breakdown(node):
+            return ", ".join(f"{stage} {value['total'] if isinstance(value, dict) else value:.1f}"
+                             for stage, value in node.items() if stage != 'total')
+        
+        def nested(node):
+            for stage, value in node.items():
+                if isinstance(value, dict):
+                    logger.info(f"   • within {stage} (ms): {breakdown(value)}")
+                    nested(value)
+        
+        paste = tree.get('hotkey_to_paste')
+        if isinstance(paste, dict):
+            logger.info(f"⏱️  Hotkey-to-paste {paste['total']:.0f} ms for #{job.seq}; stages (ms): {breakdown(paste)}")
+            nested(paste)
+        capture = tree.get('hotkey_to_capture')
+        if isinstance(capture, dict):
+            first_sample = tree.get('first_sample')
+            logger.info(f"   • Hotkey-to-capture {capture['total']:.0f} ms; stages (ms): {breakdown(capture)}"
+                        + (f"; first sample after {first_sample:.1f} ms" if first_sample is not None else ""))
+        logger.info(f"   • Over {self.stage_metrics.histogram('hotkey_to_paste').count} recording(s): "
+                    f"{self.stage_metrics.summary(['hotkey_to_paste', 'api', 'clipboard_wait'])}")
+    
+    def transcribe_audio(self, audio: AudioPayload, job: Optional['RecordingJob'] = None,
+                         retrying: bool = False) -> Optional[str]:
+        """Transcribe audio using OpenAI Whisper.
+
+        Failed uploads are handed to the spool; a spool retry (``retrying``)
+        re-raises instead so the spool can schedule the next attempt.
+        """
+        file_size = audio.size
+        
+        # Durations come from sample counts; the API bills the audio actually uploaded
+        metadata = job.audio if job else None
+        recording_duration = metadata.captured_seconds if metadata else 0.0
+        uploaded_duration = metadata.uploaded_seconds if metadata else 0.0
+        audio_duration_minutes = uploaded_duration / 60
         estimated_cost = audio_duration_minutes * self.cost_per_minute
         
         logger.info(f"📊 Recording stats:")
-        logger.info(f"   • Duration: {recording_duration:.2f}s ({audio_duration_minutes:.3f} minutes)")
-        logger.info(f"   • File size: {file_size:,} bytes ({file_size/1024:.1f} KB)")
+        logger.info(f"   • Duration: {recording_duration:.2f}s captured, {uploaded_duration:.2f}s uploaded "
+                    f"({audio_duration_minutes:.3f} minutes)")
+        logger.info(f"   • File size: {file_size:,} bytes ({file_size/1024:.1f} KB, {audio.storage})")
         logger.info(f"   • Estimated cost: ${estimated_cost:.4f}")
-        logger.info(f"   • API Provider: {self.api_provider}")
         
-        try:
-            logger.info(f"🔗 Sending to {self.api_provider} Whisper API...")
-            with open(audio_file, "rb") as file:
-                api_start = time.time()
-                response = self.client.audio.transcriptions.create(
-                    model="whisper-1",
-                    file=file,
-                    response_format="text"
-                )
-                api_duration = time.time() - api_start
-                result = response.strip()
-                
-                # Log usage to file
+        tier, route_reason = 'full', None
+        if self.router is not None:
+            tier, route_reason = self.router.choose(uploaded_duration, job.snr_db if job else None)
+            logger.info(f"🧭 Routing to the {tier} model tier: {route_reason}")
+        
+        trace = job.trace if job else LatencyTrace()
+        cache_key = self._cache_key(audio, tier)
+        if cache_key is not None:
+            with trace.span('cache_lookup'):
+                cached = self.cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"🗃️  Cache hit: skipped the API call (hit rate {self.cache.hit_rate * 100:.0f}%, "
+                            f"saved ${estimated_cost:.4f})")
                 usage_data = {
                     "timestamp": datetime.now().isoformat(),
-                    "api_provider": self.api_provider,
+                    "recording_id": job.recording_id if job else None,
+                    "api_provider": "cache",
+                    "cache_hit": True,
+                    "cache_hit_rate": round(self.cache.hit_rate, 3),
                     "recording_duration_seconds": round(recording_duration, 2),
-                    "recording_duration_minutes": round(audio_duration_minutes, 4),
                     "file_size_bytes": file_size,
-                    "file_size_kb": round(file_size/1024, 1),
-                    "api_response_time_seconds": round(api_duration, 2),
-                    "transcription_length_chars": len(result),
-                    "estimated_cost_usd": round(estimated_cost, 6),
-                    "transcription_text": result[:100] + "..." if len(result) > 100 else result
+                    "transcription_length_chars": len(cached),
+                    "estimated_cost_usd": 0.0,
+                    "cache_cost_saved_usd": round(estimated_cost, 6),
+                    "transcription_text": cached[:100] + "..." if len(cached) > 100 else cached
                 }
+                self._log_usage(usage_data, job, retrying)
+                self.counters.inc('transcriptions', provider="cache", status="ok")
+                return cached
+        
+        tried = []
+        
+        def attempt(provider: TranscriptionBackend, timeout: Optional[float]):
+            tried.append(provider.name)
+            logger.info(f"🔗 Sending to {provider.name} Whisper API...")
+            with audio.open() as file:
+                api_start = time.time()
+                response = provider.transcribe(file, tier, timeout)
+                # The tracer is thread-local, so read it on the thread that made the request
+                return response, time.time() - api_start, self.connection_tracer.last()
+        
+        try:
+            provider, (response, api_duration, connection), hedged = self.providers.transcribe(
+                attempt, timeout=self.total_timeout, cancel=job.cancel if job else None)
+            self._last_http_activity = time.monotonic()
+            trace.add('api', api_duration)
+            used_tier, model, cost_per_minute = provider.resolve(tier)
+            estimated_cost = audio_duration_minutes * cost_per_minute
+            # Saving against sending the same clip to this provider's full model
+            route_saved = audio_duration_minutes * (provider.tiers['full'][1] - cost_per_minute)
+            if self.router is not None:
+                self.router.record(used_tier, api_duration)
+            result = response.strip()
+            if cache_key is not None:
+                self.cache.put(cache_key, result)
+            remote_p50 = None
+            if not provider.remote:
+                # Compare in-process transcription against the fastest remote provider's median
+                medians = [backend.stats.percentile(50) for backend in self.providers.providers
+                           if backend.remote]
+                medians = [median for median in medians if median is not None]
+                remote_p50 = min(medians) if medians else None
+            if self.spool is not None and not retrying:
+                # The API is reachable again, so spooled recordings need not wait out their backoff
+                self.spool.retry_now()
+            
+            # Log usage to file
+            usage_data = {
+                "timestamp": datetime.now().isoformat(),
+                "recording_id": job.recording_id if job else None,
+                "api_provider": provider.name,
+                "hedged": hedged,
+                "model": model,
+                "route_tier": used_tier,
+                "route_reason": route_reason,
+                "route_snr_db": round(job.snr_db, 1) if job and job.snr_db is not None else None,
+                "route_cost_saved_usd": round(route_saved, 6),
+                "spool_retry": retrying,
+                "cache_hit": False if cache_key is not None else None,
+                "cache_hit_rate": round(self.cache.hit_rate, 3) if self.cache is not None else None,
+                "recording_duration_seconds": round(recording_duration, 2),
+                "recording_duration_minutes": round(recording_duration / 60, 4),
+                "audio_uploaded_seconds": round(uploaded_duration, 2),
+                "wall_clock_recording_seconds": round(job.stopped_at - job.started_at, 2) if job else None,
+                "throughput_audio_seconds_per_second": round(uploaded_duration / api_duration, 1) if api_duration else None,
+                "file_size_bytes": file_size,
+                "file_size_kb": round(file_size/1024, 1),
+                "upload_storage": audio.storage,
+                "upload_format": audio.format,
+                "compression_ratio": round(audio.compression_ratio, 2),
+                "encode_time_ms": round(audio.encode_seconds * 1000, 1),
+                "api_response_time_seconds": round(api_duration, 2),
+                "remote_p50_seconds": round(remote_p50, 2) if remote_p50 is not None else None,
+                "connection_reused": connection.get('connection_reused'),
+                "tcp_connect_ms": connection.get('tcp_connect_ms'),
+                "tls_handshake_ms": connection.get('tls_handshake_ms'),
+                "first_sample_latency_ms": round(job.first_sample_latency * 1000, 1) if job and job.first_sample_latency is not None else None,
+                "preroll_seconds": round(job.preroll_seconds, 2) if job else 0.0,
+                "queue_wait_seconds": round(job.queue_wait, 3) if job else 0.0,
+                "live_segment": job.segment_index + 1 if job and job.segment_index is not None else None,
+                "chunk": job.chunk_index + 1 if job and job.chunk_index is not None else None,
+                "capture_sample_rate": job.rate if job else self.RATE,
+                "upload_sample_rate": self.upload_rate or (job.rate if job else self.RATE),
+                "transcription_length_chars": len(result),
+                "estimated_cost_usd": round(estimated_cost, 6),
+                "vad_removed_seconds": round(metadata.removed_seconds, 2) if metadata else 0.0,
+                "vad_cost_saved_usd": round(metadata.removed_seconds / 60 * cost_per_minute, 6) if metadata else 0.0,
+                # Stages so far; a recording still to be pasted gets the full breakdown on delivery
+                "stage_ms": trace.as_ms(),
+                "transcription_text": result[:100] + "..." if len(result) > 100 else result
+            }
+            
+            # Queue for the background log writer
+            self._log_usage(usage_data, job, retrying)
+            self.counters.inc('transcriptions', provider=provider.name, status="ok")
+            self.counters.inc('audio_seconds', uploaded_duration)
+            self.counters.inc('upload_bytes', file_size)
+            
+            logger.info(f"✅ Transcription successful:")
+            logger.info(f"   • API Response time: {api_duration:.2f}s "
+                        f"({uploaded_duration / max(api_duration, 1e-3):.1f} audio seconds per second)")
+            logger.info(f"   • Result length: {len(result)} characters")
+            logger.info(f"   • Cost: ${estimated_cost:.4f} via {provider.name} ({model}){' (hedged)' if hedged else ''}")
+            if self.router is not None:
+                logger.info(f"   • Routing: {used_tier} tier saved ${route_saved:.4f}; {self.router.summary()}")
+            logger.info(f"   • Logged to: {self.log_file}")
+            if remote_p50 is not None:
+                logger.info(f"   • {provider.name} took {api_duration:.2f}s vs {remote_p50:.2f}s remote median "
+                            f"({remote_p50 / max(api_duration, 1e-3):.1f}x)")
+            if len(self.providers.providers) > 1:
+                logger.info(f"   • Providers: {self.providers.summary()}")
+            
+            return result
                 
-                # Append to log file
-                with open(self.log_file, "a", encoding="utf-8") as log_f:
-                    log_f.write(json.dumps(usage_data) + "\n")
-                
-                logger.info(f"✅ Transcription successful:")
-                logger.info(f"   • API Response time: {api_duration:.2f}s")
-                logger.info(f"   • Result length: {len(result)} characters")
-                logger.info(f"   • Cost: ${estimated_cost:.4f} via {self.api_provider}")
-                logger.info(f"   • Logged to: {self.log_file}")
-                
-                return result
+        except TranscriptionCancelled as e:
+            self.cancelled_count += 1
+            logger.info(f"🛑 Transcription of {job.label} cancelled: {e}")
+            cancel_data = {
+                "timestamp": datetime.now().isoformat(),
+                "recording_id": job.recording_id if job else None,
+                "api_provider": tried[-1] if tried else "none",
+                "providers_tried": list(tried),
+                "recording_duration_seconds": round(recording_duration, 2),
+                "file_size_bytes": file_size,
+                "error": str(e),
+                "cancellations_total": self.cancelled_count,
+                "timeouts_total": self.timed_out_count,
+                "status": "cancelled"
+            }
+            self.usage_log.write(cancel_data)
+            self.counters.inc('transcriptions', provider=cancel_data['api_provider'], status="cancelled")
+            return None
                 
         except Exception as e:
-            logger.error(f"❌ {self.api_provider} Transcription error: {e}")
-            self.audio_cue('error')
+            timed_out = isinstance(e, TimeoutError)
+            if timed_out:
+                self.timed_out_count += 1
+            logger.error(f"❌ Transcription failed on every provider: {e}")
+            spooled = False
+            part = job is not None and not job.is_whole_recording
+            if not retrying and not part:
+                self.audio_cue('error')
+                if job is not None:
+                    spooled = self._spool_recording(job, audio, str(e))
             
             # Log failed attempt
             error_data = {
                 "timestamp": datetime.now().isoformat(),
-                "api_provider": self.api_provider,
+                "recording_id": job.recording_id if job else None,
+                "api_provider": tried[-1] if tried else "none",
+                "providers_tried": list(tried),
                 "recording_duration_seconds": round(recording_duration, 2),
                 "file_size_bytes": file_size,
+                "upload_storage": audio.storage,
+                "upload_format": audio.format,
                 "error": str(e),
+                "spooled": spooled,
+                "spool_retry": retrying,
+                "timed_out": timed_out,
+                "cancellations_total": self.cancelled_count,
+                "timeouts_total": self.timed_out_count,
                 "status": "failed"
             }
             
-            with open(self.log_file, "a", encoding="utf-8") as log_f:
-                log_f.write(json.dumps(error_data) + "\n")
-                
+            self.usage_log.write(error_data)
+            self.counters.inc('transcriptions', provider=error_data['api_provider'],
+                              status="timeout" if timed_out else "failed")
+            
+            if retrying or part:
+                # Spool retries reschedule; parts of a recording fail the recording, which spools once
+                raise
+            return None
+    
+    def _log_usage(self, record: dict, job: Optional['RecordingJob'], retrying: bool):
+        """Log a success record, or hold it on a recording still to be pasted until its paste stages are in"""
+        if job is not None and job.seq is not None and not retrying:
+            job.usage_records.append(record)
+        else:
+            self.usage_log.write(record)
+    
+    def _wav_payload(self, pcm, rate: int) -> AudioPayload:
+        """In-memory WAV of ``pcm`` at the upload rate"""
+        writer = self._new_wav_writer(io.BytesIO(), rate)
+        writer.write(pcm)
+        writer.close()
+        return AudioPayload.from_writer(writer)
+    
+    def _spool_recording(self, job: 'RecordingJob', audio: AudioPayload, error: str) -> bool:
+        """Keep a failed recording for a background retry; at most once per recording"""
+        if self.spool is None or job.spooled or (job.cancel is not None and job.cancel.is_set()):
+            return job.spooled
+        metadata = dict(self._spool_metadata(job), pcm_digest=audio.pcm_digest)
+        job.spooled = self.spool.add(audio, metadata, error)
+        return job.spooled
+    
+    def _cache_key(self, audio: AudioPayload, tier: str = 'full') -> Optional[str]:
+        """Cache key for a payload, or None when caching is off or the PCM hash is unknown"""
+        if self.cache is None or audio.pcm_digest is None:
             return None
+        return TranscriptionCache.key(
+            audio.pcm_digest,
+            models=sorted(provider.resolve(tier)[1] for provider in self.providers.providers),
+            providers=sorted(provider.name for provider in self.providers.providers),
+            format=audio.format,
+            bitrate=getattr(self.encoder, 'bitrate', None) if audio.format == 'opus' else None
+        )
     
-    def paste_text(self, text: str):
+    def _spool_metadata(self, job: 'RecordingJob') -> dict:
+        """The parts of a job needed to log and deliver it after a spool retry"""
+        return {
+            "seq": job.seq,
+            "started_at": job.started_at,
+            "stopped_at": job.stopped_at,
+            "rate": job.rate,
+            "frame_bytes": job.frame_bytes,
+            "segment_index": job.segment_index,
+            "chunk_index": job.chunk_index,
+            "preroll_seconds": job.preroll_seconds,
+            "recording_id": job.recording_id,
+            "audio": job.audio.as_dict(),
+            "snr_db": job.snr_db
+        }
+    
+    def _retry_spooled(self, path: str, entry: dict) -> str:
+        """Re-send a spooled upload (runs on the spool thread)"""
+        audio = AudioPayload(entry['filename'], path=path, format=entry['format'], pcm_digest=entry.get('pcm_digest'))
+        job = RecordingJob(
+            started_at=entry['started_at'],
+            stopped_at=entry['stopped_at'],
+            rate=entry['rate'],
+            frame_bytes=entry['frame_bytes'],
+            preroll_seconds=entry['preroll_seconds'],
+            segment_index=entry['segment_index'],
+            chunk_index=entry['chunk_index']
+        )
+        job.seq = entry['seq']
+        job.audio = AudioMetadata.from_dict(entry['audio'])
+        job.snr_db = entry.get('snr_db')
+        job.recording_id = entry.get('recording_id')
+        if entry['format'] == 'wav' and self.chunk_executor is not None:
+            pcm, rate = read_wav_pcm(path)
+            if len(pcm) / 2 / rate > self.chunk_seconds * 1.5:
+                # A long recording is retried the way it was first sent: as parallel chunks
+                job.rate, job.frame_bytes = rate, 2
+                return self._transcribe_chunked(job, pcm, retrying=True)
+        return self.transcribe_audio(audio, job, retrying=True)
+    
+    def _deliver_spooled(self, entry: dict, text: str):
+        """Copy a recovered transcription to the clipboard and notify; the cursor may be anywhere by now"""
+        if not text:
+            logger.info(f"Spooled recording {entry['id']} transcribed to empty text")
+            return
+        recorded = datetime.fromtimestamp(entry['started_at']).strftime('%H:%M')
+        logger.info(f"📝 Recovered spooled recording from {recorded}: {text}")
+        pyperclip.copy(text)
+        notify("Voice Recorder", f"Recovered dictation from {recorded} copied to clipboard: {text[:80]}")
+        self.audio_cue('success')
+    
+    def paste_text(self, text: str, trace: Optional[LatencyTrace] = None):
         """Copy to clipboard and paste at cursor position"""
+        trace = trace or LatencyTrace()
         logger.info("Copying text to clipboard...")
         # Copy to clipboard
-        pyperclip.copy(text)
+        with trace.span('clipboard_set'):
+            pyperclip.copy(text)
         
         logger.info("Waiting 0.2s for clipboard to be set...")
         # Small delay to ensure clipboard is set
-        time.sleep(0.2)
+        with trace.span('clipboard_wait'):
+            time.sleep(0.2)
         
         system = platform.system()
         logger.info(f"Pasting text on {system}...")
         
+        keystroke_start = time.perf_counter()
         try:
             if system == "Darwin":  # macOS
                 # Use AppleScript for reliable Cmd+V on macOS
@@ -428,11 +3520,17 @@ class VoiceRecorder:
         except Exception as e:
             logger.error(f"Paste failed on {system}: {e}")
             logger.info("Text copied to clipboard - paste manually with Ctrl+V (or Cmd+V on macOS)")
+        trace.add('paste_keystroke', time.perf_counter() - keystroke_start)
     
     def on_key_press(self, key):
         """Handle key press events"""
         self.pressed_keys.add(key)
         
+        if key == Key.esc and Key.cmd in self.pressed_keys:
+            logger.info("Hotkey detected: Cmd+Esc")
+            self.cancel_transcriptions()
+            return
+        
         # Check for Cmd+` combination (backtick key)
         if (hasattr(key, 'char') and key.char == '`' and Key.cmd in self.pressed_keys):
             
@@ -444,6 +3542,16 @@ class VoiceRecorder:
                 logger.info("Starting recording due to hotkey")
                 self.start_recording()
     
+    def cancel_transcriptions(self):
+        """Abort the current recording and every transcription still in flight, discarding their results"""
+        if self.is_recording:
+            self.stop_recording()
+        event, self._cancel_event = self._cancel_event, threading.Event()
+        in_flight = self.pipeline.depth
+        event.set()
+        logger.info(f"🛑 Cancelled {in_flight} recording(s) in flight")
+        self.audio_cue('cancel')
+    
     def on_key_release(self, key):
         """Handle key release events"""
         try:
@@ -455,13 +3563,15 @@ class VoiceRecorder:
         """Start the global hotkey listener"""
         logger.info("🎯 Voice Recorder starting...")
         logger.info("📌 Hotkey: Cmd+` (press to toggle recording)")
+        logger.info("🛑 Cancel: Cmd+Esc (discards in-flight transcriptions)")
         logger.info("🚪 Press Ctrl+C to exit")
         
         # Check for API keys
         azure_key = os.getenv('AZURE_OPENAI_API_KEY')
         openai_key = os.getenv('OPENAI_API_KEY')
         
-        if not azure_key and not openai_key:
+        offline = any(not backend.remote for backend in self.providers.providers)
+        if not azure_key and not openai_key and not offline:
             logger.error("❌ Error: Either OPENAI_API_KEY or AZURE_OPENAI_API_KEY must be set")
             sys.exit(1)
         logger.info("✅ API key found")
@@ -475,8 +3585,421 @@ class VoiceRecorder:
             listener.join()
         logger.info("Keyboard listener stopped")
 
+    def shutdown(self):
+        """Finish queued transcriptions and release audio resources"""
+        self.is_recording = False
+        self._close_stream()
+        self.pipeline.shutdown()
+        if self.segment_executor is not None:
+            self.segment_executor.shutdown(wait=True)
+        if self.chunk_executor is not None:
+            self.chunk_executor.shutdown(wait=True)
+        if self.spool is not None:
+            self.spool.stop()
+        if self.metrics_server is not None:
+            self.metrics_server.shutdown()
+        self.providers.shutdown()
+        self.http_client.close()
+        self.usage_log.close()
+        if self.stage_metrics.histograms:
+            logger.info(f"⏱️  Stage latency this session: {self.stage_metrics.summary()}")
+
+class MetricsServer:
+    """Serves the recorder's counters and latency histograms at ``/metrics`` in Prometheus text format.
+
+    Everything is read from live recorder state at scrape time, so an
+    idle endpoint costs nothing. Binds to localhost unless told otherwise.
+    """
+
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+    COUNTERS = {
+        'recordings': "Recordings queued for transcription",
+        'dropped_chunks': "Audio input overflows; each drops one chunk of captured frames",
+        'transcriptions': "Finished transcriptions by winning provider and outcome",
+        'audio_seconds': "Seconds of audio uploaded for transcription",
+        'upload_bytes': "Bytes of encoded audio uploaded",
+    }
+
+    def __init__(self, recorder: 'VoiceRecorder', host: str, port: int):
+        self.recorder = recorder
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/metrics"
+
+    @staticmethod
+    def _labels(**labels) -> str:
+        if not labels:
+            return ""
+        escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+                   for value in labels.values())
+        return "{" + ",".join(f'{name}="{value}"' for name, value in zip(labels, escaped)) + "}"
+
+    def _histogram(self, lines, name: str, histogram: LatencyHistogram, **labels):
+        for bound, count in zip(self.BUCKETS, histogram.cumulative(self.BUCKETS)):
+            lines.append(f"{name}_bucket{self._labels(**labels, le=bound)} {count}")
+        lines.append(f"{name}_bucket{self._labels(**labels, le='+Inf')} {histogram.count}")
+        lines.append(f"{name}_sum{self._labels(**labels)} {histogram.total_seconds:.6f}")
+        lines.append(f"{name}_count{self._labels(**labels)} {histogram.count}")
+
+    def render(self) -> str:
+        recorder = self.recorder
+        lines = []
+        counters = recorder.counters.items()
+        for counter, help_text in self.COUNTERS.items():
+            name = f"voice_recorder_{counter}_total"
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+            values = [(labels, value) for (key, labels), value in counters if key == counter]
+            for labels, value in values or [((), 0)]:
+                lines.append(f"{name}{self._labels(**dict(labels))} {value:g}")
+        
+        providers = recorder.providers.providers
+        lines += ["# HELP voice_recorder_provider_requests_total API attempts per provider, hedged ones included",
+                  "# TYPE voice_recorder_provider_requests_total counter"]
+        lines += [f"voice_recorder_provider_requests_total{self._labels(provider=p.name)} "
+                  f"{p.stats.successes + p.stats.failures}" for p in providers]
+        lines += ["# HELP voice_recorder_provider_errors_total Failed API attempts per provider",
+                  "# TYPE voice_recorder_provider_errors_total counter"]
+        lines += [f"voice_recorder_provider_errors_total{self._labels(provider=p.name)} {p.stats.failures}"
+                  for p in providers]
+        lines += ["# HELP voice_recorder_timeouts_total Transcriptions abandoned at the total timeout",
+                  "# TYPE voice_recorder_timeouts_total counter",
+                  f"voice_recorder_timeouts_total {recorder.timed_out_count}",
+                  "# HELP voice_recorder_cancellations_total Transcriptions cancelled with the hotkey",
+                  "# TYPE voice_recorder_cancellations_total counter",
+                  f"voice_recorder_cancellations_total {recorder.cancelled_count}"]
+        
+        lines += ["# HELP voice_recorder_queue_depth Recordings submitted but not yet delivered",
+                  "# TYPE voice_recorder_queue_depth gauge",
+                  f"voice_recorder_queue_depth {recorder.pipeline.depth}",
+                  "# HELP voice_recorder_recording Whether a recording is in progress",
+                  "# TYPE voice_recorder_recording gauge",
+                  f"voice_recorder_recording {int(recorder.is_recording)}"]
+        if recorder.spool is not None:
+            lines += ["# HELP voice_recorder_spool_entries Failed uploads waiting for a retry",
+                      "# TYPE voice_recorder_spool_entries gauge",
+                      f"voice_recorder_spool_entries {len(recorder.spool)}"]
+        
+        lines += ["# HELP voice_recorder_api_latency_seconds Successful API call latency per provider",
+                  "# TYPE voice_recorder_api_latency_seconds histogram"]
+        for provider in providers:
+            self._histogram(lines, "voice_recorder_api_latency_seconds", provider.stats.histogram, provider=provider.name)
+        lines += ["# HELP voice_recorder_stage_seconds Time spent in each stage from hotkey to paste",
+                  "# TYPE voice_recorder_stage_seconds histogram"]
+        for stage, histogram in recorder.stage_metrics.items():
+            self._histogram(lines, "voice_recorder_stage_seconds", histogram, stage=stage)
+        return "\n".join(lines) + "\n"
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = server.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug(f"metrics server: {format % args}")
+
+        return Handler
+
+    def start(self):
+        threading.Thread(target=self.httpd.serve_forever, name="metrics-server", daemon=True).start()
+
+    def shutdown(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class MockTranscriptionServer:
+    """Local stand-in that speaks the OpenAI transcription API.
+
+    Answers ``POST .../audio/transcriptions`` (including Azure deployment
+    paths) with a deterministic transcript after the configured latency,
+    failing a fraction of requests with ``error_status``. Point
+    ``OPENAI_BASE_URL`` at it to benchmark throughput and latency offline.
+    """
+
+    def __init__(self, host: str, port: int, faults: FaultInjector, error_status: int = 500):
+        self.faults = faults
+        self.error_status = error_status
+        self.requests = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _reply(self, status: int, body: bytes, content_type: str = "application/json", headers=()):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in headers:
+                    self.send_header(name, value)
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(body)
+
+            def do_HEAD(self):
+                self._reply(200, b"{}")
+
+            do_GET = do_HEAD
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if not self.path.split("?")[0].endswith("/audio/transcriptions"):
+                    self._reply(404, json.dumps({"error": {"message": "Not found"}}).encode())
+                    return
+                with server._lock:
+                    server.requests += 1
+                server.faults.delay()
+                if server.faults.should_fail():
+                    with server._lock:
+                        server.errors += 1
+                    error = {"error": {"message": "Injected failure", "type": "server_error"}}
+                    retry_after = [("Retry-After", "1")] if server.error_status == 429 else []
+                    self._reply(server.error_status, json.dumps(error).encode(), headers=retry_after)
+                    return
+                text = server.faults.transcript(body)
+                if b'name="response_format"\r\n\r\ntext' in body:
+                    self._reply(200, text.encode(), "text/plain; charset=utf-8")
+                else:
+                    self._reply(200, json.dumps({"text": text}).encode())
+
+            def log_message(self, format, *args):
+                logger.debug(f"mock server: {format % args}")
+
+        return Handler
+
+    def serve_forever(self):
+        self.httpd.serve_forever()
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, name="mock-server", daemon=True).start()
+
+    def shutdown(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def read_wav_pcm(path: str):
+    """Load a 16-bit WAV file as mono int16 PCM, returning ``(pcm_bytes, sample_rate)``"""
+    with wave.open(path, 'rb') as wf:
+        if wf.getsampwidth() != 2:
+            raise ValueError(f"{path}: only 16-bit PCM WAV files are supported")
+        channels = wf.getnchannels()
+        rate = wf.getframerate()
+        pcm = wf.readframes(wf.getnframes())
+    if channels > 1:
+        samples = np.frombuffer(pcm, dtype=np.int16).reshape(-1, channels)
+        pcm = samples.mean(axis=1).astype(np.int16).tobytes()
+    return pcm, rate
+
+
+def run_upload_benchmark(args):
+    """Compare upload size and API latency for a WAV file at several sample rates"""
+    pcm, src_rate = read_wav_pcm(args.wav)
+    duration = len(pcm) / 2 / src_rate
+    rates = [int(r) for r in args.rates.split(',') if r.strip()]
+    recorder = None if args.no_api else VoiceRecorder()
+    print(f"Input: {args.wav} ({duration:.1f}s at {src_rate}Hz)")
+    print(f"{'rate':>8} {'bytes':>12} {'resample ms':>12} {'api s':>8}")
+    for rate in rates:
+        resample_start = time.perf_counter()
+        data = resample_pcm16(pcm, src_rate, rate)
+        resample_ms = (time.perf_counter() - resample_start) * 1000
+        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp_file:
+            path = tmp_file.name
+        try:
+            with wave.open(path, 'wb') as wf:
+                wf.setnchannels(1)
+                wf.setsampwidth(2)
+                wf.setframerate(rate)
+                wf.writeframes(data)
+            size = os.path.getsize(path)
+            api_seconds = float('nan')
+            if recorder is not None:
+                with open(path, "rb") as file:
+                    api_start = time.time()
+                    recorder.providers.ranked()[0].transcribe(file)
+                    api_seconds = time.time() - api_start
+        finally:
+            os.unlink(path)
+        print(f"{rate:>8} {size:>12,} {resample_ms:>12.1f} {api_seconds:>8.2f}")
+    if recorder is not None:
+        recorder.shutdown()
+
+
+def run_chunked_benchmark(args):
+    """Compare monolithic and parallel chunked transcription wall-clock time across clip lengths"""
+    pcm, rate = read_wav_pcm(args.wav)
+    recorder = VoiceRecorder()
+    recorder.cache = None  # Measure the API, not the transcription cache
+    if recorder.chunk_executor is None:
+        recorder.chunk_executor = ThreadPoolExecutor(max_workers=int(os.getenv('VOICE_CHUNK_WORKERS', '4')))
+    print(f"Input: {args.wav} ({len(pcm) / 2 / rate:.1f}s at {rate}Hz), "
+          f"{recorder.chunk_seconds:.0f}s chunks, {recorder.chunk_executor._max_workers} workers")
+    print(f"{'length s':>9} {'chunks':>7} {'single s':>9} {'chunked s':>10} {'speedup':>8}")
+    try:
+        for length in [float(x) for x in args.lengths.split(',') if x.strip()]:
+            needed = int(length * rate) * 2
+            clip = (pcm * (needed // len(pcm) + 1))[:needed]
+            job = RecordingJob(started_at=0.0, stopped_at=length, rate=rate, frame_bytes=2, pcm=clip)
+            started = time.perf_counter()
+            recorder._encode_and_transcribe(job, clip)
+            single = time.perf_counter() - started
+            started = time.perf_counter()
+            recorder._transcribe_chunked(job, clip)
+            chunked = time.perf_counter() - started
+            window = recorder.chunk_seconds - recorder.chunk_overlap_seconds
+            chunks = max(1, math.ceil((length - recorder.chunk_overlap_seconds) / window))
+            print(f"{length:>9.0f} {chunks:>7} {single:>9.2f} {chunked:>10.2f} {single / chunked:>7.2f}x")
+    finally:
+        recorder.shutdown()
+
+
+def run_log_benchmark(args):
+    """Compare per-record caller latency of synchronous appends and the background usage-log writer"""
+    record = {
+        "timestamp": datetime.now().isoformat(), "api_provider": "OpenAI", "recording_duration_seconds": 12.3,
+        "file_size_bytes": 196844, "api_response_time_seconds": 1.42, "estimated_cost_usd": 0.00123,
+        "transcription_text": "The quick brown fox jumps over the lazy dog. " * 2
+    }
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        sync_path = os.path.join(tmp_dir, "sync.jsonl")
+        latencies = []
+        for _ in range(args.records):
+            started = time.perf_counter()
+            with open(sync_path, "a", encoding="utf-8") as log_f:
+                log_f.write(json.dumps(record) + "\n")
+                if args.fsync:
+                    log_f.flush()
+                    os.fsync(log_f.fileno())
+            latencies.append(time.perf_counter() - started)
+        results['sync append'] = latencies
+        writer = UsageLogWriter(os.path.join(tmp_dir, "async.jsonl"), fsync=args.fsync)
+        writer.enqueue_latencies = deque(maxlen=args.records)
+        for _ in range(args.records):
+            writer.write(dict(record))
+        drain_start = time.perf_counter()
+        writer.close()
+        results['background writer'] = list(writer.enqueue_latencies)
+        print(f"{args.records} records, fsync {'on' if args.fsync else 'off'}; "
+              f"background writer drained in {(time.perf_counter() - drain_start) * 1000:.1f} ms")
+    print(f"{'mode':>18} {'p50 us':>9} {'p99 us':>9} {'max us':>9}")
+    for mode, samples in results.items():
+        p50, p99 = np.percentile(samples, [50, 99]) * 1e6
+        print(f"{mode:>18} {p50:>9.1f} {p99:>9.1f} {max(samples) * 1e6:>9.1f}")
+
+
+def run_stats(args):
+    """Print daily cost, audio minutes and API latency percentiles from the usage store"""
+    try:
+        store = UsageStore(args.db, read_only=True)
+    except (OSError, sqlite3.Error) as e:
+        print(f"Cannot open the usage store: {e}", file=sys.stderr)
+        print("The recorder creates it on its next start and imports the existing usage log.", file=sys.stderr)
+        sys.exit(1)
+    try:
+        since = (datetime.now() - timedelta(days=args.days - 1)).strftime('%Y-%m-%d')
+        started = time.perf_counter()
+        rows = store.daily_stats(since, args.provider)
+        query_ms = (time.perf_counter() - started) * 1000
+    finally:
+        store.close()
+    
+    def seconds(value):
+        return f"{value:.2f}" if value is not None else "-"
+    
+    print(f"{'day':<10} {'requests':>9} {'failed':>7} {'cancelled':>9} {'audio min':>10} {'cost $':>9} "
+          f"{'p50 s':>7} {'p95 s':>7}")
+    for day, requests, failures, cancelled, minutes, cost, p50, p95 in rows:
+        print(f"{day:<10} {requests:>9,} {failures:>7,} {cancelled:>9,} {minutes:>10.1f} {cost:>9.4f} "
+              f"{seconds(p50):>7} {seconds(p95):>7}")
+    print(f"{'total':<10} {sum(r[1] for r in rows):>9,} {sum(r[2] for r in rows):>7,} {sum(r[3] for r in rows):>9,} "
+          f"{sum(r[4] for r in rows):>10.1f} {sum(r[5] for r in rows):>9.4f}")
+    print(f"({len(rows)} day(s) since {since}{' for ' + args.provider if args.provider else ''}, "
+          f"queried in {query_ms:.1f} ms; requests are API calls, failed and cancelled count recordings)")
+
+
+def run_mock_server(args):
+    """Serve the OpenAI-compatible stand-in until interrupted"""
+    faults = FaultInjector(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate)
+    server = MockTranscriptionServer(args.host, args.port, faults, error_status=args.error_status)
+    print(f"Mock transcription API on {server.url} ({args.latency:.2f}s ± {args.jitter:.2f}s latency, "
+          f"{args.error_rate * 100:.0f}% HTTP {args.error_status})")
+    print(f"Use it with: OPENAI_API_KEY=mock OPENAI_BASE_URL={server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        print(f"Served {server.requests} transcription requests ({server.errors} injected errors)")
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Global voice-to-text recorder (Cmd+` to toggle recording)")
+    subparsers = parser.add_subparsers(dest='command')
+    bench = subparsers.add_parser('bench-upload', help="compare upload bytes and API latency across sample rates")
+    bench.add_argument('wav', help="16-bit PCM WAV recording to benchmark")
+    bench.add_argument('--rates', default='44100,16000', help="comma-separated sample rates to compare")
+    bench.add_argument('--no-api', action='store_true', help="only measure resampling and upload size")
+    bench_chunks = subparsers.add_parser('bench-chunked', help="compare single-request and parallel chunked transcription")
+    bench_chunks.add_argument('wav', help="16-bit PCM WAV recording, looped to reach each length")
+    bench_chunks.add_argument('--lengths', default='60,120,300', help="comma-separated clip lengths in seconds")
+    stats = subparsers.add_parser('stats', help="daily cost, audio minutes and API latency from the usage store")
+    stats.add_argument('--days', type=int, default=30, help="how many days back to report")
+    stats.add_argument('--provider', help="only this provider, e.g. \"OpenAI\"")
+    stats.add_argument('--db', default=USAGE_STORE_PATH, help="usage store to query")
+    bench_log = subparsers.add_parser('bench-log', help="measure the latency usage logging adds per transcription")
+    bench_log.add_argument('--records', type=int, default=2000)
+    bench_log.add_argument('--fsync', action='store_true', help="fsync each synchronous append and each batch")
+    serve_mock = subparsers.add_parser('serve-mock', help="run a local OpenAI-compatible transcription stand-in")
+    serve_mock.add_argument('--host', default='127.0.0.1')
+    serve_mock.add_argument('--port', type=int, default=8765)
+    serve_mock.add_argument('--latency', type=float, default=0.3, help="seconds before each response")
+    serve_mock.add_argument('--jitter', type=float, default=0.0, help="random ± seconds added to the latency")
+    serve_mock.add_argument('--error-rate', type=float, default=0.0, help="fraction of requests that fail")
+    serve_mock.add_argument('--error-status', type=int, default=500, help="HTTP status for injected failures")
+    args = parser.parse_args()
+    if args.command == 'bench-upload':
+        run_upload_benchmark(args)
+        return
+    if args.command == 'bench-chunked':
+        run_chunked_benchmark(args)
+        return
+    if args.command == 'stats':
+        run_stats(args)
+        return
+    if args.command == 'bench-log':
+        run_log_benchmark(args)
+        return
+    if args.command == 'serve-mock':
+        run_mock_server(args)
+        return
+    
     logger.info("=== Voice Recorder Application Starting ===")
+    recorder = None
     try:
         recorder = VoiceRecorder()
         recorder.run()
@@ -485,6 +4008,8 @@ def main():
     except Exception as e:
         logger.error(f"Application error: {e}")
     finally:
+        if recorder is not None:
+            recorder.shutdown()
         logger.info("=== Voice Recorder Application Ended ===")
 
 if __name__ == "__main__":